@@ -4,6 +4,7 @@ package.name = habitbuilder
 package.domain = org.kritish
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas
+source.exclude_dirs = tests
 version = 1.0
 icon.filename = icon.png
 presplash.filename = presplash.png
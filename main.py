@@ -16,18 +16,35 @@ from kivy.clock import Clock
 from kivy.core.window import Window
 import json
 import os
-from datetime import datetime, timedelta 
+import re
+from datetime import date, datetime, timedelta 
 import random
 from kivy.core.audio import SoundLoader
 from kivy.uix.filechooser import FileChooserListView
 from kivy.uix.slider import Slider
 import time
 import math
+import operator
+from array import array
+from bisect import bisect_left, bisect_right, insort
+import threading
+import queue
+import sqlite3
+from concurrent.futures import Future
+import hashlib
+import base64
+from collections import OrderedDict
+from contextlib import nullcontext
+from collections.abc import Mapping, MutableMapping
 from kivy.uix.checkbox import CheckBox
 from kivy.uix.recycleview import RecycleView
 from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.uix.label import Label
-from kivy.properties import BooleanProperty, StringProperty
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import sp
+from kivy.uix.widget import Widget
+from kivy.properties import BooleanProperty, NumericProperty, StringProperty
 from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.behaviors import FocusBehavior
 from kivy.uix.recycleview.layout import LayoutSelectionBehavior
@@ -69,6 +86,26 @@ def get_data_path():
 
 
 FILE = get_data_path()
+BACKUP_FILE = FILE + ".bak"
+WAL_FILE = FILE + ".wal"
+DB_FILE = os.path.splitext(FILE)[0] + ".db"
+LOGS_DIR = os.path.join(os.path.dirname(FILE), "logs")
+SEARCH_INDEX_FILE = os.path.splitext(FILE)[0] + ".index.json"
+SHARD_CACHE_MONTHS = 6
+WAL_COMPACT_BYTES = 256 * 1024
+SAVE_DELAY = 1.5  # Seconds to coalesce mutations before writing
+SEARCH_DELAY = 0.25  # Seconds of typing pause before a history search starts
+FUZZY_VOCABULARY_LIMIT = 10000  # Most frequent words kept for typo-tolerant search
+DETAIL_TEXTURE_LIMIT = 32  # Rendered history detail textures kept for re-expanding
+SCREEN_PREWARM_DELAY = 2  # Seconds after launch before unopened screens are built, one per frame
+FRAME_BUDGET = 0.008  # Seconds per frame ChunkedBuilder may spend building list rows
+# "json" rewrites FILE on every save; "wal" appends the changed paths to WAL_FILE
+# and folds them back into FILE once the log grows large; "sqlite" keeps day logs
+# in normalized tables in DB_FILE, migrating from FILE on first launch; "sharded"
+# keeps one file per month under LOGS_DIR and loads them on demand. All writes
+# happen on the persistence worker thread.
+STORAGE_MODE = "wal"
+SCHEMA_VERSION = 6
 MOTIVATIONAL_MESSAGES = [
     "Great job! Keep building those habits!",
     "You're making progress every day!",
@@ -79,7 +116,8 @@ MOTIVATIONAL_MESSAGES = [
 
 
 def get_default_data():
-    return {
+    data = {
+        "schema_version": SCHEMA_VERSION,
         "start_date": datetime.today().strftime("%Y-%m-%d"),
         "total_points": 0,
         "current_level": 1,
@@ -87,6 +125,8 @@ def get_default_data():
         "last_log_date": "",
         "milestones": [],
         "day_logs": {},
+        # Habit names by the integer ID day logs refer to them with
+        "habit_names": [],
         "habits": [
             {"name": "Wake up early", "points": 5},
             {"name": "Exercise (20–30 min)", "points": 5},
@@ -104,7 +144,7 @@ def get_default_data():
         "reminder_settings": {
             "enabled": False,
             "time": "20:00",  # Default time: 8 PM
-            "habits_enabled": {},  # Will store per-habit toggle states
+            "habits_enabled": {},  # Will store per-habit toggle states, keyed by habit_key()
             "snooze_until": 0,  # Timestamp for snooze expiration
             "last_streak": 0,  # To detect streak changes
             "last_reminder": 0, # Timestamp of last reminder
@@ -124,59 +164,1301 @@ def get_default_data():
             ]
         }
     }
+    data["habits"] = [new_habit(data, habit["name"], habit["points"]) for habit in data["habits"]]
+    return data
 
 
 
-def load_data():
+def _migrate_string_habits(data, defaults):
+    if isinstance(data.get("habits"), list) and all(isinstance(h, str) for h in data["habits"]):
+        data["habits"] = [{"name": h, "points": 5} for h in data["habits"]]
+
+
+def _migrate_missing_keys(data, defaults):
+    for key in defaults:
+        if key not in data:
+            data[key] = defaults[key]
+
+
+def _migrate_audio_playback(data, defaults):
+    audio = data["audio_playback"]
+    audio.setdefault("categories", defaults["audio_playback"]["categories"])
+    audio.setdefault("category_history", {})
+    audio.setdefault("file_history", {})
+
+
+def _migrate_journal_questions(data, defaults):
+    data["reminder_settings"].setdefault("journal_questions", defaults["reminder_settings"]["journal_questions"])
+
+
+def _migrate_habit_names(data, defaults):
+    # Only appended to: a ShardedDayLogs already holds on to this list and the
+    # shards it has loaded refer to names by their position in it
+    names = data.setdefault("habit_names", [])
+    if names is defaults["habit_names"]:
+        # Copied over by _migrate_missing_keys, those are the default habits' names
+        names = data["habit_names"] = []
+    for habit in data["habits"]:
+        if habit["name"] not in names:
+            names.append(habit["name"])
+    for log in data["day_logs"].values():
+        for name in log.get("Habits", {}):
+            if name not in names:
+                names.append(name)
+
+
+def _migrate_habit_ids(data, defaults):
+    names = data["habit_names"]
+    for habit in data["habits"]:
+        if habit["name"] not in names:
+            names.append(habit["name"])
+        habit["id"] = names.index(habit["name"])
+    reminders = data["reminder_settings"]
+    reminders["habits_enabled"] = {str(names.index(name)): enabled
+                                   for name, enabled in reminders["habits_enabled"].items() if name in names}
+
+
+# Ordered (version, migration) pairs; each runs once and the result is persisted
+MIGRATIONS = [
+    (1, _migrate_string_habits),
+    (2, _migrate_missing_keys),
+    (3, _migrate_audio_playback),
+    (4, _migrate_journal_questions),
+    (5, _migrate_habit_names),
+    (6, _migrate_habit_ids),
+]
+
+
+def migrate_data(data):
+    """Bring data up to SCHEMA_VERSION, returning True if anything ran"""
+    version = data.get("schema_version", 0)
+    if version >= SCHEMA_VERSION:
+        return False
+    defaults = get_default_data()
+    for target, migration in MIGRATIONS:
+        if version < target:
+            migration(data, defaults)
+            version = target
+    data["schema_version"] = version
+    return True
+
+
+_wal_generation = 0
+_snapshot_needed = True
+
+
+def _resolve_path(data, path):
+    node = data
+    for key in path:
+        if not isinstance(node, Mapping) or key not in node:
+            return False, None
+        node = node[key]
+    return True, node
+
+
+def _apply_wal_record(data, record):
+    path = record.get("path") or []
+    if not path:
+        return
+    node = data
+    for key in path[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            child = node[key] = {}
+        node = child
+    if record.get("delete"):
+        node.pop(path[-1], None)
+    else:
+        node[path[-1]] = record.get("value")
+
+
+def _read_wal(generation):
+    records = []
+    if not os.path.exists(WAL_FILE):
+        return records
+    with open(WAL_FILE, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Torn write at the tail of the log, nothing after it is valid
+                break
+            # Records from an older generation were already folded into a full snapshot
+            if record.get("gen") == generation:
+                records.append(record)
+    return records
+
+
+def _snapshot_text(data):
+    """Everything but the day logs on the first line and the day logs on the second,
+    so startup can stop reading after one line"""
+    header = {key: value for key, value in data.items() if key != "day_logs"}
+    history = data.get("day_logs", {})
+    return json.dumps(header) + "\n" + json.dumps(history, default=_json_default) + "\n"
+
+
+def _read_history(history_file, records=()):
+    with history_file:
+        text = history_file.read().strip()
+    holder = {"day_logs": json.loads(text) if text else {}}
+    for record in records:
+        _apply_wal_record(holder, record)
+    return holder["day_logs"]
+
+
+def _read_snapshot_file(path, defer_history):
+    f = open(path, "r")
     try:
-        if os.path.exists(FILE):
-            with open(FILE, "r") as f:
-                data = json.load(f)
-                if "habits" in data and isinstance(data["habits"], list) and all(
-                        isinstance(h, str) for h in data["habits"]):
-                    data["habits"] = [{"name": h, "points": 5} for h in data["habits"]]
-                default_data = get_default_data()
-                for key in default_data:
-                    if key not in data:
-                        data[key] = default_data[key]
-                # Ensure audio_playback structure exists
-                if "audio_playback" not in data:
-                    data["audio_playback"] = default_data["audio_playback"]
-                if "categories" not in data["audio_playback"]:
-                    data["audio_playback"]["categories"] = default_data["audio_playback"]["categories"]
-                if "category_history" not in data["audio_playback"]:
-                    data["audio_playback"]["category_history"] = {}
-                if "file_history" not in data["audio_playback"]:
-                    data["audio_playback"]["file_history"] = {}
-                # Ensure journal_questions exists
-                if "reminder_settings" in data and "journal_questions" not in data["reminder_settings"]:
-                    data["reminder_settings"]["journal_questions"] = get_default_data()["reminder_settings"][
-                        "journal_questions"]
-                return data
+        try:
+            data = json.loads(f.readline())
+        except ValueError:
+            # Single pretty-printed document written by older versions
+            f.seek(0)
+            return json.load(f), None
+        if "day_logs" in data or not defer_history:
+            data.setdefault("day_logs", _read_history(f))
+            return data, None
+        history_file, f = f, None
+        return data, history_file
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _read_snapshot(defer_history=False):
+    """Parse FILE, falling back to the previous generation if it is missing or torn.
+
+    With defer_history the day logs are left unread and the open file is returned
+    as the third item for _read_history."""
+    for path in (FILE, BACKUP_FILE):
+        if not os.path.exists(path):
+            continue
+        try:
+            data, history_file = _read_snapshot_file(path, defer_history)
+            return data, path, history_file
+        except ValueError as e:
+            print(f"Error parsing {path}: {e}")
+    return None, None, None
+
+
+def _fsync_directory(path):
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(text, path=FILE, backup_path=BACKUP_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    # Keep the previous generation so load_data can recover if this one is unreadable
+    if backup_path and os.path.exists(path):
+        os.replace(path, backup_path)
+    os.replace(tmp_file, path)
+    _fsync_directory(path)
+
+
+def _json_default(obj):
+    # Compact day logs are stored in their compact record form
+    if isinstance(obj, DayLogView):
+        return obj.encode()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _legacy_json_default(obj):
+    # Exports and the SQLite tables use the plain dict shape of every day log
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_snapshot(text):
+    _atomic_write(text)
+    if os.path.exists(WAL_FILE):
+        os.remove(WAL_FILE)
+
+
+def _append_wal(text):
+    with open(WAL_FILE, "a") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.getsize(WAL_FILE) > WAL_COMPACT_BYTES:
+        compact_wal()
+
+
+def compact_wal():
+    """Fold the write-ahead log into the snapshot file"""
+    if not os.path.exists(WAL_FILE):
+        return
+    snapshot, source, history_file = _read_snapshot()
+    if snapshot is None:
+        return
+    for record in _read_wal(snapshot.get("wal_generation", 0)):
+        _apply_wal_record(snapshot, record)
+    # Replaying the same records again after a crash here is harmless
+    _atomic_write(_snapshot_text(snapshot))
+    os.remove(WAL_FILE)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    day_number INTEGER,
+    completion INTEGER,
+    energy INTEGER,
+    points INTEGER,
+    streak_bonus INTEGER,
+    journal_text TEXT,
+    journal_structured INTEGER NOT NULL DEFAULT 0,
+    audio_played TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS habit_completions (
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    habit TEXT NOT NULL,
+    done INTEGER NOT NULL,
+    PRIMARY KEY (date, position)
+);
+CREATE INDEX IF NOT EXISTS idx_habit_completions_habit ON habit_completions (habit, date);
+CREATE TABLE IF NOT EXISTS journal_answers (
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    question_idx INTEGER NOT NULL,
+    selected TEXT,
+    text TEXT,
+    PRIMARY KEY (date, position)
+);
+CREATE INDEX IF NOT EXISTS idx_journal_answers_question ON journal_answers (question_idx, date);
+"""
+
+# Day log keys stored in integer columns of the days table, and the type they are read back as
+SQLITE_DAY_COLUMNS = [
+    ("DayNumber", "day_number", int),
+    ("Completion", "completion", str),
+    ("Energy", "energy", str),
+    ("Points", "points", int),
+    ("StreakBonus", "streak_bonus", int),
+]
+
+
+def _sqlite_connect():
+    os.makedirs(os.path.dirname(DB_FILE) or ".", exist_ok=True)
+    conn = sqlite3.connect(DB_FILE)
+    conn.executescript(SQLITE_SCHEMA)
+    return conn
+
+
+def _sqlite_delete_day(conn, date_str):
+    conn.execute("DELETE FROM days WHERE date = ?", (date_str,))
+    conn.execute("DELETE FROM habit_completions WHERE date = ?", (date_str,))
+    conn.execute("DELETE FROM journal_answers WHERE date = ?", (date_str,))
+
+
+def _sqlite_insert_day(conn, date_str, log):
+    extra = {}
+    columns = {}
+    for key, column, kind in SQLITE_DAY_COLUMNS:
+        if key not in log:
+            continue
+        try:
+            columns[column] = int(log[key])
+        except (ValueError, TypeError):
+            # Keep values that are not plain integers verbatim
+            extra[key] = log[key]
+
+    journal_text, structured = None, 0
+    journal = log.get("Journal")
+    if isinstance(journal, dict):
+        journal_text, structured = journal.get("free_text", ""), 1
+        for position, answer in enumerate(journal.get("answers", [])):
+            selected = json.dumps(answer["selected"]) if "selected" in answer else None
+            conn.execute(
+                "INSERT INTO journal_answers (date, position, question_idx, selected, text) VALUES (?, ?, ?, ?, ?)",
+                (date_str, position, answer.get("question_idx", -1), selected, answer.get("text")))
+    elif journal is not None:
+        journal_text = journal
+
+    for position, (habit, done) in enumerate(log.get("Habits", {}).items()):
+        conn.execute("INSERT INTO habit_completions (date, position, habit, done) VALUES (?, ?, ?, ?)",
+                     (date_str, position, habit, 1 if done else 0))
+
+    known = {key for key, _, _ in SQLITE_DAY_COLUMNS} | {"Habits", "Journal", "AudioPlayed"}
+    extra.update({key: value for key, value in log.items() if key not in known})
+    conn.execute(
+        "INSERT INTO days (date, day_number, completion, energy, points, streak_bonus, journal_text, "
+        "journal_structured, audio_played, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (date_str, columns.get("day_number"), columns.get("completion"), columns.get("energy"), columns.get("points"),
+         columns.get("streak_bonus"), journal_text, structured, log.get("AudioPlayed"),
+         json.dumps(extra) if extra else None))
+
+
+def _sqlite_load():
+    """Load everything but the day logs from DB_FILE, or None if nothing has been migrated yet"""
+    if not os.path.exists(DB_FILE):
+        return None
+    conn = _sqlite_connect()
+    try:
+        data = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM settings")}
+        return data or None
+    finally:
+        conn.close()
+
+
+def _sqlite_load_days():
+    conn = _sqlite_connect()
+    try:
+        day_logs = {}
+        rows = conn.execute(
+            "SELECT date, day_number, completion, energy, points, streak_bonus, journal_text, journal_structured, "
+            "audio_played, extra FROM days ORDER BY date")
+        for row in rows:
+            date_str = row[0]
+            log = {}
+            for (key, _, kind), value in zip(SQLITE_DAY_COLUMNS, row[1:6]):
+                if value is not None:
+                    log[key] = kind(value)
+            log["Habits"] = {}
+            if row[7]:
+                log["Journal"] = {"free_text": row[6] or "", "answers": []}
+            elif row[6] is not None:
+                log["Journal"] = row[6]
+            if row[8] is not None:
+                log["AudioPlayed"] = row[8]
+            if row[9]:
+                log.update(json.loads(row[9]))
+            day_logs[date_str] = log
+
+        for date_str, habit, done in conn.execute(
+                "SELECT date, habit, done FROM habit_completions ORDER BY date, position"):
+            if date_str in day_logs:
+                day_logs[date_str]["Habits"][habit] = bool(done)
+        for date_str, question_idx, selected, text in conn.execute(
+                "SELECT date, question_idx, selected, text FROM journal_answers ORDER BY date, position"):
+            journal = day_logs.get(date_str, {}).get("Journal")
+            if not isinstance(journal, dict):
+                continue
+            answer = {"question_idx": question_idx}
+            if selected is not None:
+                answer["selected"] = json.loads(selected)
+            if text is not None:
+                answer["text"] = text
+            journal["answers"].append(answer)
+        return day_logs
+    finally:
+        conn.close()
+
+
+def _sqlite_rename_habits(conn, names):
+    """Carry renames in the habit_names table over to habit_completions"""
+    row = conn.execute("SELECT value FROM settings WHERE key = 'habit_names'").fetchone()
+    old_names = json.loads(row[0]) if row else []
+    renamed = [(i, old, new) for i, (old, new) in enumerate(zip(old_names, names)) if old != new]
+    # Through a placeholder first, so a name freed by one rename can be taken by another
+    for i, old, new in renamed:
+        conn.execute("UPDATE habit_completions SET habit = ? WHERE habit = ?", (f"\0{i}", old))
+    for i, old, new in renamed:
+        conn.execute("UPDATE habit_completions SET habit = ? WHERE habit = ?", (new, f"\0{i}"))
+
+
+def _sqlite_write(text):
+    payload = json.loads(text)
+    conn = _sqlite_connect()
+    try:
+        with conn:
+            if payload.get("replace_days"):
+                for table in ("days", "habit_completions", "journal_answers"):
+                    conn.execute(f"DELETE FROM {table}")
+            if "habit_names" in payload.get("settings", {}):
+                _sqlite_rename_habits(conn, payload["settings"]["habit_names"])
+            for key in payload.get("deleted", []):
+                conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+            for key, value in payload.get("settings", {}).items():
+                conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            for date_str, log in payload.get("days", {}).items():
+                _sqlite_delete_day(conn, date_str)
+                if isinstance(log, dict):
+                    _sqlite_insert_day(conn, date_str, log)
+    finally:
+        conn.close()
+
+
+def _sqlite_payload(data, changed):
+    if changed is None:
+        settings = {key: value for key, value in data.items() if key != "day_logs"}
+        return {"replace_days": True, "settings": settings, "days": data.get("day_logs", {})}
+
+    payload = {"settings": {}, "deleted": [], "days": {}}
+    for path in changed:
+        path = [path] if isinstance(path, str) else list(path)
+        key = path[0]
+        if key == "day_logs" and len(path) > 1:
+            payload["days"][path[1]] = data.get("day_logs", {}).get(path[1])
+        elif key == "day_logs":
+            payload["replace_days"] = True
+            payload["days"] = data.get("day_logs", {})
+        elif key in data:
+            payload["settings"][key] = data[key]
         else:
-            return get_default_data()
+            payload["deleted"].append(key)
+    return payload
+
+
+# Day log fields kept in array columns: (key, type read back as, array typecode)
+COMPACT_COLUMNS = [
+    ("DayNumber", int, "i"),
+    ("Completion", str, "b"),
+    ("Energy", str, "b"),
+    ("Points", int, "i"),
+    ("StreakBonus", int, "i"),
+]
+COMPACT_KINDS = {key: kind for key, kind, typecode in COMPACT_COLUMNS}
+COMPACT_MISSING = {"b": -2 ** 7, "i": -2 ** 31}
+# Fields most days lack, kept in sparse row -> value dicts rather than one slot per row
+COMPACT_SPARSE = ("Journal", "AudioPlayed")
+# Stored as the done mask of a day with no Habits at all; done bits are a subset
+# of tracked ones, so no real day has tracked == 0 with this
+COMPACT_NO_HABITS = 1
+
+
+def _encode_compact_value(value, kind, typecode):
+    """The integer to store in a column, or None if value has to be kept verbatim"""
+    if kind is int and type(value) is int:
+        number = value
+    elif kind is str and isinstance(value, str):
+        try:
+            number = int(value)
+        except ValueError:
+            return None
+        if str(number) != value:
+            return None
+    else:
+        return None
+    bits = 8 if typecode == "b" else 32
+    if COMPACT_MISSING[typecode] < number < 2 ** (bits - 1):
+        return number
+    return None
+
+
+class DateIndex:
+    """Sorted array of the date ordinals in day_logs, for range lookups without sorting"""
+
+    def __init__(self, dates=()):
+        ordinals = set()
+        for date_str in dates:
+            try:
+                ordinals.add(date_ordinal(date_str))
+            except ValueError:
+                pass
+        self.ordinals = array("i", sorted(ordinals))
+
+    def add(self, date_str):
+        try:
+            ordinal = date_ordinal(date_str)
+        except ValueError:
+            return
+        i = bisect_left(self.ordinals, ordinal)
+        if i == len(self.ordinals) or self.ordinals[i] != ordinal:
+            self.ordinals.insert(i, ordinal)
+
+    def discard(self, date_str):
+        try:
+            ordinal = date_ordinal(date_str)
+        except ValueError:
+            return
+        i = bisect_left(self.ordinals, ordinal)
+        if i < len(self.ordinals) and self.ordinals[i] == ordinal:
+            del self.ordinals[i]
+
+    def between(self, first=None, last=None):
+        """Ordinals from first to last inclusive, either end may be left open"""
+        lo = 0 if first is None else bisect_left(self.ordinals, first)
+        hi = len(self.ordinals) if last is None else bisect_right(self.ordinals, last)
+        return self.ordinals[lo:hi]
+
+    def dates(self, first=None, last=None, newest_first=False):
+        ordinals = self.between(first, last)
+        if newest_first:
+            ordinals = reversed(ordinals)
+        return [ordinal_date(ordinal) for ordinal in ordinals]
+
+    def __len__(self):
+        return len(self.ordinals)
+
+
+def date_index(day_logs):
+    """The DateIndex kept by day_logs, or a fresh one for a plain dict"""
+    index = getattr(day_logs, "date_index", None)
+    return index if index is not None else DateIndex(day_logs)
+
+
+class DayLogView(MutableMapping):
+    """Dict-shaped view of one row of a CompactDayLogs"""
+    __slots__ = ("logs", "row")
+
+    def __init__(self, logs, row):
+        self.logs = logs
+        self.row = row
+
+    def __getitem__(self, key):
+        return self.logs.get_field(self.row, key)
+
+    def __setitem__(self, key, value):
+        log = dict(self)
+        log[key] = value
+        self.logs.store(self.row, log)
+
+    def __delitem__(self, key):
+        log = dict(self)
+        del log[key]
+        self.logs.store(self.row, log)
+
+    def __iter__(self):
+        return iter(self.logs.field_names(self.row))
+
+    def __len__(self):
+        return len(self.logs.field_names(self.row))
+
+    def encode(self):
+        return self.logs.encode(self.row)
+
+
+class CompactDayLogs(MutableMapping):
+    """day_logs stored column-wise.
+
+    Habits are referred to by their index in habit_names, each day keeps a
+    bitmask of tracked and of completed habits (in array("Q") columns while
+    there are at most 64 habit IDs), and the numeric fields live in array
+    columns. Journal and AudioPlayed, which many days lack, sit in sparse
+    row -> value dicts, as does anything else a day carries. Reading a day
+    returns a DayLogView with the usual dict shape.
+
+    Only the UI thread writes; lock is held while it does, and workers hold it
+    to read a day (see day_log_snapshot) or to test one with matches."""
+
+    def __init__(self, habit_names, logs=None, lock=None):
+        self.habit_names = habit_names
+        self.lock = lock or threading.RLock()
+        self.refresh_habit_ids()
+        self.date_index = DateIndex()
+        self.rows = {}
+        self.tracked = array("Q")
+        self.done = array("Q")
+        self.columns = {key: array(typecode) for key, kind, typecode in COMPACT_COLUMNS}
+        self.sparse = {key: {} for key in COMPACT_SPARSE}
+        self.extras = {}
+        for date_str, log in (logs or {}).items():
+            try:
+                self[date_str] = log
+            except (TypeError, ValueError, KeyError, AttributeError, OverflowError) as e:
+                # A malformed entry costs that one day, not the whole history
+                print(f"Error loading day log {date_str}: {e}")
+        # Set by every write, so ShardedDayLogs keeps edited months until they are saved
+        self.unsaved = False
+
+    def refresh_habit_ids(self):
+        self.habit_ids = {name: i for i, name in enumerate(self.habit_names)}
+
+    def habit_id(self, name):
+        if name not in self.habit_ids:
+            # habit_names is shared, another holder may have added it already
+            self.refresh_habit_ids()
+        if name not in self.habit_ids:
+            self.habit_ids[name] = len(self.habit_names)
+            self.habit_names.append(name)
+        return self.habit_ids[name]
+
+    def habit_name(self, habit_id):
+        return self.habit_names[habit_id] if habit_id < len(self.habit_names) else f"#{habit_id}"
+
+    def habit_bits(self, row):
+        """(tracked, done) bitmasks of a row, or None if the day has no Habits at all"""
+        tracked, done = self.tracked[row], self.done[row]
+        if not tracked and done == COMPACT_NO_HABITS:
+            return None
+        return tracked, done
+
+    def store(self, row, log):
+        with self.lock:
+            self._store(row, log)
+
+    def _store(self, row, log):
+        self.unsaved = True
+        extra = {}
+        for key, kind, typecode in COMPACT_COLUMNS:
+            number = _encode_compact_value(log[key], kind, typecode) if key in log else None
+            self.columns[key][row] = COMPACT_MISSING[typecode] if number is None else number
+            if number is None and key in log:
+                extra[key] = log[key]
+
+        habits = log.get("Habits")
+        tracked = done = 0
+        if isinstance(habits, Mapping):
+            for name, completed in habits.items():
+                bit = 1 << self.habit_id(name)
+                tracked |= bit
+                if completed:
+                    done |= bit
+        elif "HabitMask" in log:
+            tracked, done = log["HabitMask"]
+        else:
+            # No habits recorded at all, as opposed to an empty dict
+            done = COMPACT_NO_HABITS
+            if "Habits" in log:
+                extra["Habits"] = habits
+        if isinstance(self.tracked, array) and max(tracked, done) >> 64:
+            # Past 64 habit IDs the masks no longer fit, fall back to Python ints
+            self.tracked, self.done = list(self.tracked), list(self.done)
+        self.tracked[row] = tracked
+        self.done[row] = done
+
+        for key, values in self.sparse.items():
+            if key in log:
+                values[row] = log[key]
+            else:
+                values.pop(row, None)
+        for key, value in log.items():
+            if key not in self.columns and key not in self.sparse and key not in ("Habits", "HabitMask"):
+                extra[key] = value
+        if extra:
+            self.extras[row] = extra
+        else:
+            self.extras.pop(row, None)
+
+    def get_field(self, row, key):
+        if key == "Habits" and self.habit_bits(row) is not None:
+            tracked, done = self.habit_bits(row)
+            habits = {}
+            habit_id = 0
+            while tracked:
+                if tracked & 1:
+                    habits[self.habit_name(habit_id)] = bool(done & 1)
+                tracked >>= 1
+                done >>= 1
+                habit_id += 1
+            return habits
+        if key in self.columns:
+            value = self.columns[key][row]
+            typecode = self.columns[key].typecode
+            if value != COMPACT_MISSING[typecode]:
+                return COMPACT_KINDS[key](value)
+        elif key in self.sparse and row in self.sparse[key]:
+            return self.sparse[key][row]
+        extra = self.extras.get(row)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def field_names(self, row):
+        names = []
+        for key, kind, typecode in COMPACT_COLUMNS:
+            if self.columns[key][row] != COMPACT_MISSING[typecode]:
+                names.append(key)
+            if key == "Completion" and self.habit_bits(row) is not None:
+                names.append("Habits")
+        names.extend(key for key, values in self.sparse.items() if row in values)
+        extra = self.extras.get(row)
+        if extra:
+            names.extend(key for key in extra if key not in names)
+        return names
+
+    def matches(self, date_str, habit_masks=(), done=None, comparisons=()):
+        """Test a day against habit and numeric filters straight from the columns"""
+        with self.lock:
+            row = self.rows.get(date_str)
+            return row is not None and self._matches(row, habit_masks, done, comparisons)
+
+    def _matches(self, row, habit_masks, done, comparisons):
+        if habit_masks or done is not None:
+            bits = self.habit_bits(row)
+            if bits is None:
+                return False
+            tracked, done_bits = bits
+            missed = tracked & ~done_bits
+            for mask in habit_masks or (tracked,):
+                if not tracked & mask:
+                    return False
+                if done is True and not done_bits & tracked & mask:
+                    return False
+                if done is False and not missed & mask:
+                    return False
+            if done is True and not habit_masks and (missed or not tracked):
+                return False
+        for key, compare, value in comparisons:
+            column = self.columns[key]
+            stored = column[row]
+            if stored == COMPACT_MISSING[column.typecode] or not compare(stored, value):
+                return False
+        return True
+
+    def encode(self, row):
+        record = {}
+        for key, kind, typecode in COMPACT_COLUMNS:
+            value = self.columns[key][row]
+            if value != COMPACT_MISSING[typecode]:
+                record[key] = kind(value)
+        bits = self.habit_bits(row)
+        if bits is not None:
+            record["HabitMask"] = list(bits)
+        for key, values in self.sparse.items():
+            if row in values:
+                record[key] = values[row]
+        if row in self.extras:
+            record.update(self.extras[row])
+        return record
+
+    def __getitem__(self, date_str):
+        return DayLogView(self, self.rows[date_str])
+
+    def __setitem__(self, date_str, log):
+        if isinstance(log, DayLogView):
+            log = dict(log)
+        with self.lock:
+            row = self.rows.get(date_str)
+            if row is not None:
+                self._store(row, log)
+                return
+            row = len(self.tracked)
+            self.tracked.append(0)
+            self.done.append(COMPACT_NO_HABITS)
+            for column in self.columns.values():
+                column.append(0)
+            self._store(row, log)
+            # Published only once the row is filled in, a failed store leaves an unused slot
+            self.rows[date_str] = row
+            self.date_index.add(date_str)
+
+    def __delitem__(self, date_str):
+        with self.lock:
+            row = self.rows.pop(date_str)
+            self.date_index.discard(date_str)
+            self.unsaved = True
+            # The row's slots stay allocated, deleting days is rare
+            self.tracked[row] = 0
+            self.done[row] = COMPACT_NO_HABITS
+            for values in self.sparse.values():
+                values.pop(row, None)
+            self.extras.pop(row, None)
+
+    def __contains__(self, date_str):
+        return date_str in self.rows
+
+    def __iter__(self):
+        return iter(list(self.rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def day_log_snapshot(day_logs, date_str):
+    """A plain dict copy of one day log, or None without one; how worker threads
+    read days while the UI thread may be writing them"""
+    with getattr(day_logs, "lock", None) or nullcontext():
+        if date_str not in day_logs:
+            return None
+        return dict(day_logs[date_str])
+
+
+def compact_day_logs(data):
+    """Switch data["day_logs"] over to CompactDayLogs if it is still a plain dict"""
+    day_logs = data.setdefault("day_logs", {})
+    if not isinstance(day_logs, (CompactDayLogs, ShardedDayLogs)):
+        day_logs = data["day_logs"] = CompactDayLogs(data.setdefault("habit_names", []), day_logs)
+    return day_logs
+
+
+def _shard_path(month):
+    return os.path.join(LOGS_DIR, f"{month}.json")
+
+
+def _read_shard(month):
+    if not os.path.exists(_shard_path(month)):
+        return {}
+    try:
+        with open(_shard_path(month), "r") as f:
+            return json.load(f)
+    except ValueError as e:
+        print(f"Error loading {month} logs: {e}")
+        return {}
+
+
+def _write_shard(month, text):
+    _atomic_write(text, _shard_path(month), None)
+
+
+def _remove_stale_shards(months):
+    if not os.path.isdir(LOGS_DIR):
+        return
+    for name in os.listdir(LOGS_DIR):
+        if name.endswith(".json") and name[:-5] not in months:
+            os.remove(os.path.join(LOGS_DIR, name))
+
+
+class ShardedDayLogs(MutableMapping):
+    """day_logs backed by one file per month, keeping the most recent months in memory.
+
+    search_worker loads and evicts shards too, so lock (shared with the resident
+    CompactDayLogs) guards the manifest and the resident months."""
+
+    def __init__(self, manifest, habit_names):
+        # month -> sorted list of dates stored in that month's shard
+        self.manifest = {month: list(dates) for month, dates in manifest.items()}
+        self.habit_names = habit_names
+        self.lock = threading.RLock()
+        self.date_index = DateIndex(date_str for dates in self.manifest.values() for date_str in dates)
+        self.resident = OrderedDict()
+        # month -> day logs queued for writing but maybe not on disk yet, see _sharded_save
+        self.unwritten = {}
+
+    def shard(self, month):
+        with self.lock:
+            if month in self.resident:
+                self.resident.move_to_end(month)
+                return self.resident[month]
+            logs = self.unwritten.get(month)
+            if logs is None:
+                logs = _read_shard(month)
+            # Heal a manifest that missed a day written just before a crash
+            dates = self.manifest.setdefault(month, [])
+            for date_str in logs:
+                if date_str not in dates:
+                    insort(dates, date_str)
+                    self.date_index.add(date_str)
+            if not dates:
+                del self.manifest[month]
+            logs = CompactDayLogs(self.habit_names, logs, self.lock)
+            self.resident[month] = logs
+            self._evict()
+            return logs
+
+    def _evict(self):
+        # The current month stays, and so does any month with edits _sharded_save has not queued yet
+        current = datetime.today().strftime("%Y-%m")
+        for month, logs in list(self.resident.items()):
+            if len(self.resident) <= SHARD_CACHE_MONTHS:
+                break
+            if month != current and not logs.unsaved:
+                del self.resident[month]
+
+    def unsaved_months(self):
+        with self.lock:
+            return {month for month, logs in self.resident.items() if logs.unsaved}
+
+    def months(self):
+        with self.lock:
+            return sorted(self.manifest)
+
+    def refresh_habit_ids(self):
+        with self.lock:
+            for logs in self.resident.values():
+                logs.refresh_habit_ids()
+
+    def matches(self, date_str, *filters):
+        with self.lock:
+            return date_str in self and self.shard(date_str[:7]).matches(date_str, *filters)
+
+    def __contains__(self, date_str):
+        return date_str in self.manifest.get(str(date_str)[:7], ())
+
+    def __getitem__(self, date_str):
+        with self.lock:
+            if date_str not in self:
+                raise KeyError(date_str)
+            return self.shard(date_str[:7])[date_str]
+
+    def __setitem__(self, date_str, log):
+        month = date_str[:7]
+        with self.lock:
+            self.shard(month)[date_str] = log
+            dates = self.manifest.setdefault(month, [])
+            if date_str not in dates:
+                insort(dates, date_str)
+                self.date_index.add(date_str)
+
+    def __delitem__(self, date_str):
+        month = date_str[:7]
+        with self.lock:
+            if date_str not in self:
+                raise KeyError(date_str)
+            self.shard(month).pop(date_str, None)
+            self.manifest[month].remove(date_str)
+            self.date_index.discard(date_str)
+            if not self.manifest[month]:
+                del self.manifest[month]
+
+    def __iter__(self):
+        for month in self.months():
+            with self.lock:
+                dates = list(self.manifest.get(month, ()))
+            yield from dates
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(dates) for dates in self.manifest.values())
+
+
+def _sharded_save(data, changed):
+    day_logs = data.get("day_logs", {})
+    root = {key: value for key, value in data.items() if key != "day_logs"}
+
+    if isinstance(day_logs, ShardedDayLogs):
+        paths = [(path,) if isinstance(path, str) else tuple(path) for path in changed or []]
+        with day_logs.lock:
+            root["log_shards"] = {month: list(dates) for month, dates in day_logs.manifest.items()}
+            resident = set(day_logs.resident)
+        if changed is None or ("day_logs",) in paths:
+            # Edited months are never evicted before being written here, so the
+            # shards that are not resident are unchanged on disk
+            months = resident
+        else:
+            months = {path[1][:7] for path in paths if path[0] == "day_logs" and len(path) > 1}
+            months |= day_logs.unsaved_months()
+        for month in months:
+            logs = day_logs.shard(month)
+            persistence_worker.submit(_write_shard, month, json.dumps(logs, default=_json_default))
+            logs.unsaved = False
+    else:
+        # Splitting a plain dict, e.g. on migration, import or reset
+        shards = {}
+        for date_str, log in day_logs.items():
+            shards.setdefault(date_str[:7], {})[date_str] = log
+        root["log_shards"] = {month: sorted(logs) for month, logs in shards.items()}
+        # From here on only the shards that change are rewritten
+        sharded = ShardedDayLogs(root["log_shards"], data.setdefault("habit_names", []))
+        sharded.unwritten.update(shards)
+        for month, logs in shards.items():
+            persistence_worker.submit(_write_shard, month, json.dumps(logs, default=_json_default))
+            persistence_worker.submit(sharded.unwritten.pop, month, None)
+        persistence_worker.submit(_remove_stale_shards, set(shards))
+        data["day_logs"] = sharded
+
+    persistence_worker.submit(_atomic_write, json.dumps(root))
+
+
+class PersistenceWorker:
+    """Runs every disk write on one background thread, in submission order"""
+
+    def __init__(self):
+        self.tasks = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args):
+        self.tasks.put((func, args))
+
+    def wait(self):
+        self.tasks.join()
+
+    def _run(self):
+        while True:
+            func, args = self.tasks.get()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error saving data: {e}")
+            finally:
+                self.tasks.task_done()
+
+
+persistence_worker = PersistenceWorker()
+# Search index updates and their writes, on a thread of their own so a long
+# index rebuild never holds up saving data
+index_worker = PersistenceWorker()
+
+
+class SearchWorker:
+    """Runs history searches on a background thread, one at a time.
+
+    Only the latest submission matters: a search still waiting is replaced,
+    one already running sees is_cancelled() turn true, and a result is handed
+    to its callback on the Clock only if nothing newer was submitted since."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = None
+        self.generation = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, func, callback):
+        """func(is_cancelled) runs on the worker and returns the result, or None once cancelled"""
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, func, callback)
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.generation += 1
+            self.pending = None
+
+    def _deliver(self, generation, callback, result):
+        if generation == self.generation:
+            callback(result)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                generation, func, callback = self.pending
+                self.pending = None
+            try:
+                result = func(lambda: generation != self.generation)
+            except Exception as e:
+                print(f"Error searching history: {e}")
+                continue
+            if result is not None and generation == self.generation:
+                Clock.schedule_once(lambda dt: self._deliver(generation, callback, result), 0)
+
+
+search_worker = SearchWorker()
+
+
+def _load_history_async(data, load_history, history_ready):
+    """Runs on a background thread. The day logs are built apart from data, with
+    a copy of habit_names, and put in place by _publish_history on the UI thread"""
+    known = len(data.get("habit_names", []))
+    names = list(data.get("habit_names", []))
+    try:
+        try:
+            raw_logs = load_history()
+        except ValueError as e:
+            print(f"Error loading history: {e}")
+            snapshot, source, history_file = _read_snapshot()
+            raw_logs = snapshot["day_logs"] if snapshot else {}
+        day_logs = CompactDayLogs(names, raw_logs)
     except Exception as e:
-        print(f"Error loading data: {e}")
-        return get_default_data()
+        print(f"Error loading history: {e}")
+        day_logs = CompactDayLogs(names)
+    Clock.schedule_once(lambda dt: _publish_history(data, day_logs, known, history_ready), 0)
+
+
+def _publish_history(data, day_logs, known, history_ready):
+    """Swap the loaded day_logs in on the UI thread; history_ready resolves whatever
+    goes wrong, since the UI waits for it. known is the number of habit names there
+    were when loading started"""
+    try:
+        names = data.setdefault("habit_names", [])
+        added = day_logs.habit_names[known:]
+        if added and len(names) > known:
+            # Habits were added on both sides meanwhile, so their IDs clash; re-encode
+            day_logs = CompactDayLogs(names, {date_str: dict(day_logs[date_str]) for date_str in day_logs})
+        else:
+            # Renames made meanwhile only changed names, IDs stayed put
+            names.extend(added)
+            day_logs.habit_names = names
+            day_logs.refresh_habit_ids()
+        data["day_logs"] = day_logs
+    except Exception as e:
+        print(f"Error loading history: {e}")
+    finally:
+        history_ready.set_result(data["day_logs"])
+
 
+def load_data(history_ready=None):
+    """Load the data tree.
 
-def save_data(data):
+    If history_ready (a Future) is given and the stored data needs no migration,
+    only the small header is parsed here; day_logs starts empty, is loaded on a
+    background thread, and history_ready resolves once it is in place, which
+    happens on the Clock."""
+    global _wal_generation, _snapshot_needed
+    defer = history_ready is not None
+    load_history = None
     try:
-        os.makedirs(os.path.dirname(FILE), exist_ok=True)
-        with open(FILE, "w") as f:
-            json.dump(data, f, indent=2)
+        data = _sqlite_load() if STORAGE_MODE == "sqlite" else None
+        if data is not None:
+            _snapshot_needed = False
+            if defer and data.get("schema_version", 0) >= SCHEMA_VERSION:
+                load_history = _sqlite_load_days
+            else:
+                data["day_logs"] = _sqlite_load_days()
+        else:
+            data, source, history_file = _read_snapshot(defer)
+            if data is None:
+                data = get_default_data()
+                compact_day_logs(data)
+                if defer:
+                    history_ready.set_result(data["day_logs"])
+                return data
+            _wal_generation = data.pop("wal_generation", 0)
+            records = _read_wal(_wal_generation) if STORAGE_MODE == "wal" else []
+            # A snapshot recovered from the backup, or one being migrated into
+            # DB_FILE or month shards, is written out in full on the next save
+            _snapshot_needed = source != FILE or STORAGE_MODE == "sqlite"
+            if history_file is not None and (_snapshot_needed or STORAGE_MODE == "sharded" or
+                                             data.get("schema_version", 0) < SCHEMA_VERSION):
+                data["day_logs"] = _read_history(history_file)
+                history_file = None
+            if history_file is None:
+                for record in records:
+                    _apply_wal_record(data, record)
+            else:
+                for record in records:
+                    if record["path"][0] != "day_logs":
+                        _apply_wal_record(data, record)
+                history_records = [record for record in records if record["path"][0] == "day_logs"]
+                load_history = lambda: _read_history(history_file, history_records)
+            if STORAGE_MODE == "sharded":
+                if "log_shards" in data:
+                    day_logs = ShardedDayLogs(data.pop("log_shards"), data.setdefault("habit_names", []))
+                    day_logs.shard(datetime.today().strftime("%Y-%m"))
+                    data["day_logs"] = day_logs
+                else:
+                    _snapshot_needed = True
+        migrated = migrate_data(data)
+        compact_day_logs(data)
+        if migrated or (STORAGE_MODE in ("sqlite", "sharded") and _snapshot_needed):
+            save_data(data)
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        data = get_default_data()
+        compact_day_logs(data)
+        load_history = None
+
+    if load_history is not None:
+        # Until then day_logs is the empty CompactDayLogs made above
+        threading.Thread(target=_load_history_async, args=(data, load_history, history_ready),
+                         daemon=True).start()
+    elif defer:
+        history_ready.set_result(data["day_logs"])
+    return data
+
+
+def save_data(data, changed=None):
+    """Queue data for the writer thread; changed lists the key paths touched since the last save"""
+    global _wal_generation, _snapshot_needed
+    try:
+        if changed is not None and "habit_names" in data:
+            changed = [(path,) if isinstance(path, str) else tuple(path) for path in changed]
+            # Compact day records refer to habits by ID, so the name table travels with them
+            if any(path[0] == "day_logs" for path in changed) and ("habit_names",) not in changed:
+                changed.append(("habit_names",))
+
+        if STORAGE_MODE == "sqlite":
+            payload = _sqlite_payload(data, None if _snapshot_needed else changed)
+            _snapshot_needed = False
+            persistence_worker.submit(_sqlite_write, json.dumps(payload, default=_legacy_json_default))
+            return
+
+        if STORAGE_MODE == "sharded":
+            _sharded_save(data, None if _snapshot_needed else changed)
+            _snapshot_needed = False
+            return
+
+        if STORAGE_MODE != "wal" or changed is None or _snapshot_needed:
+            _wal_generation += 1
+            _snapshot_needed = False
+            snapshot = dict(data)
+            snapshot["wal_generation"] = _wal_generation
+            persistence_worker.submit(_write_snapshot, _snapshot_text(snapshot))
+            return
+
+        lines = []
+        for path in changed:
+            path = [path] if isinstance(path, str) else list(path)
+            found, value = _resolve_path(data, path)
+            record = {"gen": _wal_generation, "path": path}
+            if found:
+                record["value"] = value
+            else:
+                record["delete"] = True
+            lines.append(json.dumps(record, default=_json_default) + "\n")
+        persistence_worker.submit(_append_wal, "".join(lines))
     except Exception as e:
         print(f"Error saving data: {e}")
 
 
+def date_ordinal(date_str):
+    """Ordinal of a "%Y-%m-%d" string, sliced apart instead of going through strptime"""
+    return date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
+
+
+def ordinal_date(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def today_ordinal():
+    return date.today().toordinal()
+
+
+def last_days_range(days):
+    """(first, last) ordinals of the last `days` days, today included"""
+    today = today_ordinal()
+    return today - days + 1, today
+
+
+def month_range(month):
+    """(first, last) ordinals of a "%Y-%m" month"""
+    year, month = int(month[:4]), int(month[5:7])
+    first = date(year, month, 1).toordinal()
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, following.toordinal() - 1
+
+
+def month_start(ordinal):
+    """Ordinal of the first day of ordinal's month"""
+    return ordinal - date.fromordinal(ordinal).day + 1
+
+
 def get_day_number(start_date):
     try:
-        today = datetime.today()
-        return (today - datetime.strptime(start_date, "%Y-%m-%d")).days + 1
+        return today_ordinal() - date_ordinal(start_date) + 1
     except ValueError:
         return 1
 
 
+def new_habit(data, name, points):
+    """A habit record; a name seen before gets its old ID back, and with it its history"""
+    names = data.setdefault("habit_names", [])
+    if name not in names:
+        names.append(name)
+    return {"id": names.index(name), "name": name, "points": points}
+
+
+def rename_habit(data, habit, new_name):
+    # Day logs refer to the habit by ID, so only the name table changes
+    data["habit_names"][habit["id"]] = new_name
+    habit["name"] = new_name
+    day_logs = data.get("day_logs")
+    if isinstance(day_logs, (CompactDayLogs, ShardedDayLogs)):
+        day_logs.refresh_habit_ids()
+
+
+def revive_habit(data, habit, name):
+    """Switch habit over to the ID of the removed habit called name, and so to its
+    history; days logged under habit's current ID keep its current name"""
+    habits_enabled = data["reminder_settings"]["habits_enabled"]
+    enabled = habits_enabled.pop(habit_key(habit), None)
+    habit["id"] = data["habit_names"].index(name)
+    habit["name"] = name
+    if enabled is not None:
+        habits_enabled[habit_key(habit)] = enabled
+
+
+def habit_key(habit):
+    """Key for per-habit settings such as reminder_settings["habits_enabled"]"""
+    return str(habit["id"])
+
+
 def calculate_points(log, habits):
     points = 0
     habit_points = {h["name"]: h["points"] for h in habits}
@@ -197,9 +1479,7 @@ def update_streak(data):
         return 0
     if last_log:
         try:
-            last_date = datetime.strptime(last_log, "%Y-%m-%d")
-            today_date = datetime.strptime(today, "%Y-%m-%d")
-            delta = (today_date - last_date).days
+            delta = today_ordinal() - date_ordinal(last_log)
             if delta == 1:
                 data["streak"] += 1
             elif delta > 1:
@@ -229,35 +1509,884 @@ def update_levels_and_milestones(data, app):
         data["milestones"] = []
 
 
+class SaveCoordinator:
+    """Coalesces bursts of mutations into a single save_data call on the Clock"""
+
+    def __init__(self, app):
+        self.app = app
+        self.dirty = False
+        self.full_save = False
+        self.pending = []
+        self.hashes = {}
+        self._trigger = Clock.create_trigger(self.flush, SAVE_DELAY)
+
+    def mark_dirty(self, changed=None):
+        self.dirty = True
+        if changed is None:
+            self.full_save = True
+        else:
+            for path in changed:
+                path = (path,) if isinstance(path, str) else tuple(path)
+                if path not in self.pending:
+                    self.pending.append(path)
+        self._trigger()
+        self._notify(changed)
+
+    def _notify(self, changed):
+        """Tell views what changed, every mutation of day_logs comes through here"""
+        invalidated = questions_changed = changed is None
+        for path in changed or ():
+            path = (path,) if isinstance(path, str) else tuple(path)
+            if path[0] == "day_logs" and len(path) > 1:
+                self.app.dispatch('on_day_log_changed', path[1])
+            elif path[:2] == ("reminder_settings", "journal_questions"):
+                invalidated = questions_changed = True
+            elif path[0] in ("day_logs", "habit_names"):
+                invalidated = True
+        if questions_changed:
+            self.app.questions_version += 1
+        if invalidated:
+            self.app.dispatch('on_history_invalidated')
+
+    def _digest(self, value):
+        encoded = json.dumps(value, sort_keys=True, default=_json_default).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
+    def flush(self, dt=None):
+        self._trigger.cancel()
+        if not self.dirty:
+            return
+        data = self.app.data
+        full_save, pending = self.full_save, self.pending
+        self.dirty, self.full_save, self.pending = False, False, []
+
+        if full_save:
+            digest = self._digest(data)
+            if digest != self.hashes.get(None):
+                save_data(data)
+            # Per-path digests may be stale after the whole tree was replaced
+            self.hashes = {None: digest}
+            return
+
+        changed = []
+        for path in pending:
+            found, value = _resolve_path(data, path)
+            digest = self._digest(value) if found else None
+            if self.hashes.get(path, "") != digest:
+                changed.append(path)
+                self.hashes[path] = digest
+        if changed:
+            self.hashes.pop(None, None)
+            save_data(data, changed)
+
+
+SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+
+def search_tokens(text):
+    return SEARCH_TOKEN_RE.findall(text.lower())
+
+
+def day_search_fields(log, questions):
+    """The strings of a day log that HistoryScreen searches"""
+    fields = [str(log[field]) for field in ("Completion", "Energy", "DayNumber") if field in log]
+    fields.extend(log.get("Habits", {}))
+    journal = log.get("Journal", {})
+    if isinstance(journal, str):
+        fields.append(journal)
+    elif journal:
+        if journal.get("free_text"):
+            fields.append(journal["free_text"])
+        for answer in journal.get("answers", []):
+            question_idx = answer.get("question_idx", -1)
+            if not 0 <= question_idx < len(questions):
+                continue
+            question = questions[question_idx]
+            fields.append(question["text"])
+            selected_idx = answer.get("selected", -1)
+            if not isinstance(selected_idx, int) or not 0 <= selected_idx < len(question["options"]):
+                selected_idx = -1
+            if question["type"] == "FreeText":
+                fields.append(answer.get("text", ""))
+            elif question["type"] == "MultipleChoice" and selected_idx >= 0:
+                fields.append(question["options"][selected_idx])
+            elif question["type"] == "MultipleChoiceOrText" and selected_idx >= 0:
+                if selected_idx == len(question["options"]) - 1:  # "Other" option
+                    fields.append(answer.get("text", ""))
+                else:
+                    fields.append(question["options"][selected_idx])
+    return fields
+
+
+def edit_distance(a, b):
+    """Levenshtein distance, computed a column at a time in the bits of an int (Myers/Hyyrö)"""
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    mask = (1 << len(b)) - 1
+    high = 1 << (len(b) - 1)
+    matches = {}
+    for i, char in enumerate(b):
+        matches[char] = matches.get(char, 0) | (1 << i)
+    plus, minus, score = mask, 0, len(b)
+    for char in a:
+        eq = matches.get(char, 0)
+        xv = eq | minus
+        xh = (((eq & plus) + plus) ^ plus) | eq
+        horizontal_plus = minus | (~(xh | plus) & mask)
+        horizontal_minus = plus & xh
+        if horizontal_plus & high:
+            score += 1
+        elif horizontal_minus & high:
+            score -= 1
+        horizontal_plus = ((horizontal_plus << 1) | 1) & mask
+        horizontal_minus = (horizontal_minus << 1) & mask
+        plus = horizontal_minus | (~(xv | horizontal_plus) & mask)
+        minus = horizontal_plus & xv
+    return score
+
+
+def fuzzy_distance(word):
+    """Typos tolerated in a search word: none for short words, more for long ones.
+    Four letters are too few: "work" would find "word" and "fork"."""
+    if len(word) < 5 or not word.isalpha():
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+class BKTree:
+    """Words arranged by edit distance to each other, so the ones within a few
+    typos of a query are found without comparing against every word"""
+
+    def __init__(self, limit=FUZZY_VOCABULARY_LIMIT):
+        # Each node is (word, {distance: child node})
+        self.root = None
+        self.size = 0
+        self.limit = limit
+
+    def add(self, word):
+        if self.size >= self.limit:
+            return False
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return True
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return False
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return True
+            node = child
+
+    def search(self, word, max_distance):
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                results.append(node_word)
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+
+def day_details_text(log, questions):
+    """The text HistoryScreen shows for an expanded day"""
+    details = [
+        f"Completion: {log.get('Completion', '')}%",
+        f"Energy: {log.get('Energy', '')}",
+        "Habits:"
+    ]
+
+    # Add habits with status indicators
+    habits = log.get("Habits", {})
+    for habit, completed in habits.items():
+        status = "✓" if completed else "✗"
+        details.append(f"  {status} {habit}")
+
+    # Add journal if exists
+    journal = log.get("Journal", {})
+    if journal:
+        details.append("\nJournal:")
+        if isinstance(journal, str):
+            details.append(journal)
+        else:
+            # Free text
+            if journal.get("free_text"):
+                details.append(f"  {journal['free_text']}")
+
+            # Questions
+            for answer in journal.get("answers", []):
+                question_idx = answer.get("question_idx", -1)
+                if not 0 <= question_idx < len(questions):
+                    continue
+                question = questions[question_idx]
+                q_text = question["text"]
+                selected_idx = answer.get("selected", -1)
+
+                if question["type"] == "FreeText":
+                    details.append(f"  Q: {q_text}")
+                    details.append(f"    A: {answer.get('text', '')}")
+                elif question["type"] == "MultipleChoice":
+                    details.append(f"  Q: {q_text}")
+                    if isinstance(selected_idx, int) and 0 <= selected_idx < len(question["options"]):
+                        details.append(f"    A: {question['options'][selected_idx]}")
+                elif question["type"] == "MultipleChoiceOrText":
+                    details.append(f"  Q: {q_text}")
+                    if isinstance(selected_idx, int) and 0 <= selected_idx < len(question["options"]):
+                        if selected_idx == len(question["options"]) - 1:  # "Other" option
+                            details.append(f"    A: {answer.get('text', '')}")
+                        else:
+                            details.append(f"    A: {question['options'][selected_idx]}")
+    return "\n".join(details)
+
+
+def day_matches(log, questions, search_text):
+    search_text = search_text.lower()
+    return any(search_text in field.lower() for field in day_search_fields(log, questions))
+
+
+def day_fuzzy_matches(log, questions, word):
+    """Whether a day has a word within fuzzy_distance(word) typos of word, the
+    one-day counterpart of SearchIndex.fuzzy_days"""
+    max_distance = fuzzy_distance(word)
+    if not max_distance:
+        return False
+    return any(fuzzy_distance(token) and abs(len(token) - len(word)) <= max_distance and
+               edit_distance(word, token) <= max_distance
+               for field in day_search_fields(log, questions) for token in search_tokens(field))
+
+
+def day_text_matches(log, questions, text):
+    """Whether a day matches one text term of a history search, as a substring of
+    a field or as a near miss of one of its words"""
+    return day_matches(log, questions, text) or day_fuzzy_matches(log, questions, text)
+
+
+def _posting_add(ordinals, ordinal):
+    if not ordinals or ordinals[-1] < ordinal:
+        ordinals.append(ordinal)
+        return
+    i = bisect_left(ordinals, ordinal)
+    if i == len(ordinals) or ordinals[i] != ordinal:
+        ordinals.insert(i, ordinal)
+
+
+def _posting_remove(ordinals, ordinal):
+    i = bisect_left(ordinals, ordinal)
+    if i < len(ordinals) and ordinals[i] == ordinal:
+        del ordinals[i]
+        return True
+    return False
+
+
+def _field_grams(field):
+    """Trigrams of a lowercased field; a field shorter than three characters is its own gram"""
+    if len(field) < 3:
+        return {field} if field else set()
+    return {field[i:i + 3] for i in range(len(field) - 2)}
+
+
+def _day_search_keys(log, questions):
+    """The words and trigrams SearchIndex files a day under"""
+    tokens, grams = set(), set()
+    for field in day_search_fields(log, questions):
+        field = field.lower()
+        tokens.update(search_tokens(field))
+        grams.update(_field_grams(field))
+    return tokens, grams
+
+
+def _encode_postings(postings):
+    return {key: base64.b64encode(ordinals.tobytes()).decode("ascii") for key, ordinals in postings.items()}
+
+
+def _decode_postings(stored):
+    postings = {}
+    for key, encoded in stored.items():
+        ordinals = postings[key] = array("i")
+        ordinals.frombytes(base64.b64decode(encoded))
+    return postings
+
+
+class SearchIndex:
+    """Inverted indexes from words and from trigrams to the date ordinals of the days
+    containing them, each posting a sorted array.
+
+    Kept in SEARCH_INDEX_FILE together with a fingerprint of the journal
+    questions, which are part of every day's text; a mismatch means the index
+    is rebuilt. Habit names are kept alongside, so a rename re-indexes just the
+    days that have that habit. Days re-indexed since the file was written are
+    appended to log_path and replayed on load; compact() folds them in. Every
+    write runs on index_worker."""
+
+    def __init__(self, path=None):
+        self.path = path or SEARCH_INDEX_FILE
+        self.log_path = self.path + ".log"
+        # Searches and syncs run on search_worker, single-day updates on index_worker
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.grams = {}
+        self.dates = set()
+        # BKTree over the words in postings, built on the first fuzzy lookup
+        self.fuzzy = None
+        self.fingerprint = None
+        self.habit_names = []
+        # Bumped by every compaction, log records from older ones are already in the file
+        self.generation = 0
+        self.loaded = False
+
+    def _fingerprint(self, data):
+        questions = data["reminder_settings"].get("journal_questions", [])
+        return hashlib.sha1(json.dumps(questions, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def load(self):
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+            self.postings = _decode_postings(stored.get("postings", {}))
+            self.grams = _decode_postings(stored.get("grams", {}))
+        except (OSError, ValueError) as e:
+            print(f"Error loading search index: {e}")
+            self.clear()
+            return
+        self.fingerprint = stored.get("fingerprint")
+        self.habit_names = stored.get("habit_names", [])
+        self.generation = stored.get("generation", 0)
+        self.dates = set(stored.get("dates", []))
+        self.fuzzy = None
+        self._replay_log()
+
+    def _replay_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail of the log, nothing after it is valid
+                    break
+                if record.get("gen") == self.generation:
+                    self._remove(record["day"])
+                    if "tokens" in record:
+                        self._insert(record["day"], record["tokens"], record["grams"])
+
+    def compact(self):
+        """Write the whole index out and start a new log; runs on index_worker"""
+        with self.lock:
+            self.generation += 1
+            stored = {
+                "fingerprint": self.fingerprint,
+                "habit_names": self.habit_names,
+                "generation": self.generation,
+                "dates": list(self.dates),
+                "postings": _encode_postings(self.postings),
+                "grams": _encode_postings(self.grams),
+            }
+        _atomic_write(json.dumps(stored, separators=(",", ":")), self.path, None)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def clear(self):
+        with self.lock:
+            self.postings, self.grams, self.dates = {}, {}, set()
+            self.fuzzy = None
+            self.fingerprint = None
+            self.habit_names = []
+            self.loaded = True
+
+    def _remove(self, ordinal):
+        if ordinal not in self.dates:
+            return
+        self.dates.discard(ordinal)
+        # Bisects every posting, cheap next to keeping a per-day token list
+        for postings in (self.postings, self.grams):
+            emptied = [key for key, ordinals in postings.items() if _posting_remove(ordinals, ordinal) and not ordinals]
+            for key in emptied:
+                del postings[key]
+
+    def _insert(self, ordinal, tokens, grams):
+        self.dates.add(ordinal)
+        for postings, keys in ((self.postings, tokens), (self.grams, grams)):
+            for key in keys:
+                if key not in postings:
+                    postings[key] = array("i")
+                    if postings is self.postings and self.fuzzy is not None and fuzzy_distance(key):
+                        self.fuzzy.add(key)
+                _posting_add(postings[key], ordinal)
+
+    def _renamed(self, day_logs, names):
+        """Ordinals of the indexed days with a habit whose name changed since it was indexed"""
+        mask = 0
+        for habit_id, name in enumerate(self.habit_names[:len(names)]):
+            if names[habit_id] != name:
+                mask |= 1 << habit_id
+        if not mask:
+            return set()
+        return {ordinal for ordinal in self.dates if day_logs.matches(ordinal_date(ordinal), [mask])}
+
+    def sync(self, data):
+        """Bring the index in line with data["day_logs"], indexing only what is missing"""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            day_logs = data.get("day_logs", {})
+            questions = data["reminder_settings"].get("journal_questions", [])
+            fingerprint = self._fingerprint(data)
+            changed = fingerprint != self.fingerprint
+            if changed:
+                self.clear()
+                self.fingerprint = fingerprint
+            names = list(data.get("habit_names", []))
+            # Copied, submit_log may add a day on the UI thread meanwhile
+            ordinals = list(date_index(day_logs).ordinals)
+            stale = self.dates.difference(ordinals) | self._renamed(day_logs, names)
+            for ordinal in stale:
+                self._remove(ordinal)
+            # Names appended since, for new habits, leave every indexed day as it was
+            changed = changed or bool(stale) or names != self.habit_names
+            self.habit_names = names
+            # Oldest first, so postings are mostly appended to
+            for ordinal in ordinals:
+                if ordinal not in self.dates:
+                    log = day_log_snapshot(day_logs, ordinal_date(ordinal))
+                    if log is not None:
+                        self._insert(ordinal, *_day_search_keys(log, questions))
+                        changed = True
+        if changed:
+            index_worker.submit(self.compact)
+
+    def update_day(self, data, date_str):
+        """Re-index one day after submit_log or save_journal changed it, on index_worker"""
+        log = day_log_snapshot(data.get("day_logs", {}), date_str)
+        questions = list(data["reminder_settings"].get("journal_questions", []))
+        index_worker.submit(self._update_day, date_ordinal(date_str), log, questions, self._fingerprint(data))
+
+    def _update_day(self, ordinal, log, questions, fingerprint):
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            if self.fingerprint != fingerprint:
+                # Stale as a whole, the next sync rebuilds it
+                return
+            self._remove(ordinal)
+            record = {"gen": self.generation, "day": ordinal}
+            if log is not None:
+                tokens, grams = _day_search_keys(log, questions)
+                self._insert(ordinal, tokens, grams)
+                record["tokens"], record["grams"] = sorted(tokens), sorted(grams)
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        if os.path.getsize(self.log_path) > WAL_COMPACT_BYTES:
+            self.compact()
+
+    def reset(self):
+        """Empty the index, on disk too, when day_logs is replaced wholesale"""
+        self.clear()
+        index_worker.submit(self.compact)
+
+    def flush(self):
+        """Fold the log into the index file, e.g. when the app is paused or stopped"""
+        index_worker.submit(self._fold_log)
+
+    def _fold_log(self):
+        if os.path.exists(self.log_path):
+            self.compact()
+
+    def fuzzy_days(self, word):
+        """Ordinals of the days containing a word within fuzzy_distance(word) typos of
+        word, or None if the vocabulary outgrew the BKTree and any day might"""
+        max_distance = fuzzy_distance(word)
+        if not max_distance:
+            return set()
+        with self.lock:
+            if self.fuzzy is None:
+                self.fuzzy = BKTree()
+                words = [token for token in self.postings if fuzzy_distance(token)]
+                # Frequent words first: they sit near the root and survive the size limit
+                words.sort(key=lambda token: len(self.postings[token]), reverse=True)
+                for token in words[:self.fuzzy.limit]:
+                    self.fuzzy.add(token)
+            if self.fuzzy.size >= self.fuzzy.limit:
+                return None
+            days = set()
+            for token in self.fuzzy.search(word, max_distance):
+                days.update(self.postings.get(token, ()))
+            return days
+
+    def candidates(self, query):
+        """Ordinals of the days that may contain query as a substring of one field,
+        to be verified with day_matches; None if the query is empty"""
+        with self.lock:
+            query = query.lower()
+            if not query:
+                return None
+            if len(query) < 3:
+                result = set()
+                for gram, ordinals in self.grams.items():
+                    if query in gram:
+                        result.update(ordinals)
+                return result
+            postings = sorted((self.grams.get(gram, ()) for gram in _field_grams(query)), key=len)
+            result = set(postings[0])
+            for ordinals in postings[1:]:
+                if not result:
+                    break
+                result.intersection_update(ordinals)
+            return result
+
+
+# Numeric query fields and the COMPACT_COLUMNS key each one compares
+QUERY_FIELDS = {
+    "energy": "Energy",
+    "completion": "Completion",
+    "points": "Points",
+    "day": "DayNumber",
+    "bonus": "StreakBonus",
+}
+QUERY_OPERATORS = {
+    ":": operator.eq,
+    "=": operator.eq,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+QUERY_TERM_RE = re.compile(r'(\w+)(>=|<=|:|=|>|<)("[^"]*"?|\S*)|"([^"]*)"?|(\S+)')
+
+
+def _query_date_bound(text, last):
+    """First (or last) ordinal of a YYYY, YYYY-MM or YYYY-MM-DD period"""
+    parts = text.split("-")
+    if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(text)
+    if len(parts) == 1:
+        year = int(parts[0])
+        return date(year, 12, 31).toordinal() if last else date(year, 1, 1).toordinal()
+    if len(parts) == 2:
+        first_ordinal, last_ordinal = month_range(f"{int(parts[0]):04d}-{int(parts[1]):02d}")
+        return last_ordinal if last else first_ordinal
+    return date(int(parts[0]), int(parts[1]), int(parts[2])).toordinal()
+
+
+class HistoryQuery:
+    """A parsed history search, e.g. habit:Exercise done:no energy>=7 date:2026-05..2026-07 "learned".
+
+    habit: matches habit names by substring, done: yes/no applies to those
+    habits (or to all of a day's habits without one), date: takes YYYY,
+    YYYY-MM, YYYY-MM-DD, a..b ranges with either end open, or Nd for the
+    last N days. Bare words and quoted phrases must each appear in one
+    searchable field, as in a plain search; a word of five letters or more
+    also matches days with a word a typo or two away (see fuzzy_distance).
+    Anything that does not parse as a filter is searched for as text."""
+
+    def __init__(self):
+        self.first = None
+        self.last = None
+        self.habits = []
+        self.done = None
+        self.comparisons = []
+        self.texts = []
+
+    def add_filter(self, field, op, value):
+        if field == "date" and op == ":":
+            if value.endswith("d") and value[:-1].isdigit():
+                first, last = last_days_range(int(value[:-1]))
+            elif ".." in value:
+                start, end = value.split("..", 1)
+                first = _query_date_bound(start, False) if start else None
+                last = _query_date_bound(end, True) if end else None
+            else:
+                first, last = _query_date_bound(value, False), _query_date_bound(value, True)
+            self.first = first if self.first is None or first is None else max(self.first, first)
+            self.last = last if self.last is None or last is None else min(self.last, last)
+        elif field == "habit" and op == ":" and value:
+            self.habits.append(value)
+        elif field == "done" and op == ":" and value in ("yes", "no"):
+            self.done = value == "yes"
+        elif field in QUERY_FIELDS:
+            self.comparisons.append((QUERY_FIELDS[field], QUERY_OPERATORS[op], int(value)))
+        else:
+            raise ValueError(field)
+
+
+def parse_query(text):
+    query = HistoryQuery()
+    for match in QUERY_TERM_RE.finditer(text.lower()):
+        field, op, value, phrase, word = match.groups()
+        if field is not None:
+            try:
+                query.add_filter(field, op, value.strip('"'))
+                continue
+            except ValueError:
+                word = match.group(0)
+        text_term = phrase if phrase is not None else word
+        if text_term:
+            query.texts.append(text_term)
+    return query
+
+
+def query_habit_masks(data, query):
+    """One bitmask of habit IDs per habit: filter, or None if a filter matches no habit"""
+    habit_masks = []
+    names = data.get("habit_names", [])
+    for pattern in query.habits:
+        mask = 0
+        for habit_id, name in enumerate(names):
+            if pattern in name.lower():
+                mask |= 1 << habit_id
+        if not mask:
+            return None
+        habit_masks.append(mask)
+    return habit_masks
+
+
+def query_history(data, query, search_index=None, is_cancelled=None):
+    """Dates matching query (a string or HistoryQuery), newest first, or None if
+    is_cancelled() turned true. The date range comes from the DateIndex, text
+    terms are narrowed with search_index when given, and habit and numeric
+    filters are read off the compact columns one day at a time (a few
+    microseconds each; there are no per-habit postings to intersect)."""
+    if isinstance(query, str):
+        query = parse_query(query)
+    day_logs = compact_day_logs(data)
+    questions = data["reminder_settings"].get("journal_questions", [])
+
+    ordinals = date_index(day_logs).between(query.first, query.last)
+    if search_index is not None:
+        # Only narrows the days to verify, so results match a search without an index
+        for text in query.texts:
+            fuzzy_days = search_index.fuzzy_days(text)
+            if fuzzy_days is None:
+                continue
+            candidates = search_index.candidates(text)
+            ordinals = [ordinal for ordinal in ordinals if ordinal in candidates or ordinal in fuzzy_days]
+
+    habit_masks = query_habit_masks(data, query)
+    if habit_masks is None:
+        return []
+
+    dates = []
+    for i, ordinal in enumerate(reversed(ordinals)):
+        if is_cancelled is not None and i % 64 == 0 and is_cancelled():
+            return None
+        date_str = ordinal_date(ordinal)
+        if day_query_matches(day_logs, date_str, query, habit_masks, questions):
+            dates.append(date_str)
+    return dates
+
+
+def day_query_matches(day_logs, date_str, query, habit_masks, questions):
+    """Whether one day passes the habit, numeric and text filters of query; the
+    date range and query_habit_masks are left to the caller"""
+    if habit_masks or query.done is not None or query.comparisons:
+        if not day_logs.matches(date_str, habit_masks, query.done, query.comparisons):
+            return False
+    if not query.texts:
+        return True
+    log = day_log_snapshot(day_logs, date_str)
+    return log is not None and all(day_text_matches(log, questions, text) for text in query.texts)
+
+
+class ChunkedBuilder:
+    """Builds a long list a few rows per frame.
+
+    builders yields callables that each build one row; it is consumed lazily,
+    so work done while yielding (listing a directory, say) is spread out too.
+    Every frame runs builders until budget seconds have passed, then calls
+    on_progress(done) with the count so far; on_done() follows the last one.
+    cancel() stops it, e.g. when the user navigates away."""
+
+    def __init__(self, builders, on_progress=None, on_done=None, budget=FRAME_BUDGET):
+        self.builders = iter(builders)
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.budget = budget
+        self.done = 0
+        self.running = True
+        self.finished = False
+        self.trigger = Clock.create_trigger(self.step, 0)
+        # The first chunk goes out right away so short lists never flicker
+        self.step()
+
+    def step(self, dt=None):
+        if not self.running:
+            return
+        deadline = time.perf_counter() + self.budget
+        for build in self.builders:
+            build()
+            self.done += 1
+            if time.perf_counter() >= deadline:
+                break
+        else:
+            self.running = False
+            self.finished = True
+            if self.on_done is not None:
+                self.on_done()
+            return
+        if self.on_progress is not None:
+            self.on_progress(self.done)
+        self.trigger()
+
+    def cancel(self):
+        self.running = False
+        self.trigger.cancel()
+
+
+class ConfirmDialog(Popup):
+    """Message with confirm and cancel buttons, built once and rebound by setup()"""
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint=(0.8, 0.4), **kwargs)
+        self.callback = None
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        self.message_label = Label(color=(1, 1, 1, 1))
+        content.add_widget(self.message_label)
+        button_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
+        self.confirm_btn = Button(color=(1, 1, 1, 1))
+        self.confirm_btn.bind(on_press=self.on_confirm)
+        self.cancel_btn = Button(color=(1, 1, 1, 1))
+        self.cancel_btn.bind(on_press=self.dismiss)
+        button_layout.add_widget(self.confirm_btn)
+        button_layout.add_widget(self.cancel_btn)
+        content.add_widget(button_layout)
+        self.content = content
+
+    def setup(self, title, message, callback, confirm_text, cancel_text, confirm_color, cancel_color):
+        self.title = title
+        self.message_label.text = message
+        self.callback = callback
+        self.confirm_btn.text = confirm_text
+        self.confirm_btn.background_color = confirm_color
+        self.cancel_btn.text = cancel_text
+        self.cancel_btn.background_color = cancel_color
+
+    def on_confirm(self, instance):
+        # A callback returning False keeps the dialog open, e.g. after reporting an error
+        if self.callback() is not False:
+            self.dismiss()
+
+
+class PromptDialog(Popup):
+    """Message with a text field and save/cancel buttons, built once and rebound by setup()"""
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint=(0.8, 0.4), **kwargs)
+        self.callback = None
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        self.message_label = Label(color=(1, 1, 1, 1))
+        content.add_widget(self.message_label)
+        self.text_input = TextInput(multiline=False, foreground_color=(1, 1, 1, 1),
+                                    background_color=(0.15, 0.15, 0.15, 1))
+        content.add_widget(self.text_input)
+        button_layout = BoxLayout(size_hint_y=0.3, spacing=10)
+        self.submit_btn = Button(color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
+        self.submit_btn.bind(on_press=self.on_submit)
+        cancel_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
+        cancel_btn.bind(on_press=self.dismiss)
+        button_layout.add_widget(self.submit_btn)
+        button_layout.add_widget(cancel_btn)
+        content.add_widget(button_layout)
+        self.content = content
+
+    def setup(self, title, message, text, callback, submit_text):
+        self.title = title
+        self.message_label.text = message
+        self.text_input.text = text
+        self.callback = callback
+        self.submit_btn.text = submit_text
+
+    def on_submit(self, instance):
+        if self.callback(self.text_input.text.strip()) is not False:
+            self.dismiss()
+
+
+class NotifyDialog(Popup):
+    """Message only, dismissed by touching outside it"""
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint=(0.8, 0.4), auto_dismiss=True, **kwargs)
+        self.content = Label(color=(1, 1, 1, 1))
+
+    def setup(self, title, message):
+        self.title = title
+        self.content.text = message
+
+
+class DialogPool:
+    """Hands out confirm, prompt and notify dialogs, reusing any that are closed.
+
+    Each dialog's widget tree is built once; a dialog still open (or still
+    fading out) is skipped, so nested dialogs get an instance of their own."""
+
+    def __init__(self):
+        self.dialogs = {}
+
+    def acquire(self, dialog_class):
+        pool = self.dialogs.setdefault(dialog_class, [])
+        for dialog in pool:
+            if dialog.parent is None:
+                return dialog
+        dialog = dialog_class()
+        pool.append(dialog)
+        return dialog
+
+    def confirm(self, title, message, callback, confirm_text='Yes', cancel_text='No',
+                confirm_color=(0.3, 0.3, 0.3, 1), cancel_color=(0.3, 0.3, 0.3, 1)):
+        """callback() runs on confirm; the dialog then closes unless it returned False"""
+        dialog = self.acquire(ConfirmDialog)
+        dialog.setup(title, message, callback, confirm_text, cancel_text, confirm_color, cancel_color)
+        dialog.open()
+        return dialog
+
+    def prompt(self, title, message, text, callback, submit_text='Save'):
+        """callback(text) runs on submit; the dialog then closes unless it returned False"""
+        dialog = self.acquire(PromptDialog)
+        dialog.setup(title, message, text, callback, submit_text)
+        dialog.open()
+        return dialog
+
+    def notify(self, message, title='Notification'):
+        dialog = self.acquire(NotifyDialog)
+        dialog.setup(title, message)
+        dialog.open()
+        return dialog
+
+
 class HabitsScreen(Screen):
     def __init__(self, app, **kwargs):
         super().__init__(**kwargs)
         self.app = app
         self.habit_states = {}
+        # habit_key -> row, in display order
+        self.habit_rows = {}
         Clock.schedule_once(self.build_ui, 0)
 
     def build_ui(self, dt=None):
         self.clear_widgets()
+        self.habit_rows = {}
         layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
         header_label = Label(text='Habit Builder', font_size=30, size_hint_y=0.1, color=(1, 1, 1, 1))
         layout.add_widget(header_label)
         self.stats_label = Label(text=self.get_stats_text(), font_size=16, size_hint_y=0.1, color=(1, 1, 1, 1))
         layout.add_widget(self.stats_label)
         scroll = ScrollView(size_hint_y=0.6)
-        habits_layout = BoxLayout(orientation='vertical', spacing=5, size_hint_y=None)
-        habits_layout.bind(minimum_height=habits_layout.setter('height'))
-        self.habit_states = {}
-        for habit in self.app.data["habits"]:
-            habit_name = habit["name"]
-            habit_row = BoxLayout(orientation='horizontal', size_hint_y=None, height=50, spacing=10)
-            label = Label(text=habit_name, font_size=14, text_size=(None, None), color=(1, 1, 1, 1))
-            habit_row.add_widget(label)
-            toggle = ToggleButton(text='Done', size_hint_x=0.3, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-            toggle.bind(state=self.update_button_color)
-            self.habit_states[habit_name] = toggle
-            habit_row.add_widget(toggle)
-            habits_layout.add_widget(habit_row)
-        scroll.add_widget(habits_layout)
+        self.habits_layout = BoxLayout(orientation='vertical', spacing=5, size_hint_y=None)
+        self.habits_layout.bind(minimum_height=self.habits_layout.setter('height'))
+        self.update_habits()
+        scroll.add_widget(self.habits_layout)
         layout.add_widget(scroll)
         energy_layout = BoxLayout(size_hint_y=0.1, spacing=10)
         energy_layout.add_widget(Label(text='Energy Level (1-10):', font_size=14, color=(1, 1, 1, 1)))
@@ -270,6 +2399,41 @@ class HabitsScreen(Screen):
         layout.add_widget(submit_btn)
         self.add_widget(layout)
 
+    def update_habits(self):
+        """Bring the habit rows in line with data["habits"].
+
+        Rows are keyed by habit id, so a renamed habit is only relabelled and
+        every surviving row keeps its toggle state."""
+        rows = {}
+        self.habit_states = {}
+        for habit in self.app.data["habits"]:
+            key = habit_key(habit)
+            row = self.habit_rows.pop(key, None) or self.habit_row()
+            row.label.text = habit["name"]
+            rows[key] = row
+            self.habit_states[habit["name"]] = row.toggle
+        for row in self.habit_rows.values():
+            self.habits_layout.remove_widget(row)
+        self.habit_rows = rows
+
+        # children is in reverse display order; only misplaced rows are moved
+        for position, row in enumerate(rows.values()):
+            shown = self.habits_layout.children
+            if position < len(shown) and shown[-1 - position] is row:
+                continue
+            if row.parent is not None:
+                self.habits_layout.remove_widget(row)
+            self.habits_layout.add_widget(row, index=len(self.habits_layout.children) - position)
+
+    def habit_row(self):
+        habit_row = BoxLayout(orientation='horizontal', size_hint_y=None, height=50, spacing=10)
+        habit_row.label = Label(font_size=14, text_size=(None, None), color=(1, 1, 1, 1))
+        habit_row.add_widget(habit_row.label)
+        habit_row.toggle = ToggleButton(text='Done', size_hint_x=0.3, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
+        habit_row.toggle.bind(state=self.update_button_color)
+        habit_row.add_widget(habit_row.toggle)
+        return habit_row
+
     def update_button_color(self, instance, value):
         if value == 'down':
             instance.background_color = (0, 0.5, 0, 1)  # Green
@@ -288,33 +2452,19 @@ class HabitsScreen(Screen):
         total_habits = len(self.habit_states)
         completion_percentage = (habits_done / total_habits * 100) if total_habits > 0 else 0
 
-        # Create confirmation popup
-        content = BoxLayout(orientation='vertical', spacing=10)
-        content.add_widget(Label(
-            text=f'Completion: {int(completion_percentage)}%\nEnergy: {self.energy_spinner.text}\n\nSubmit this log?',
-            color=(1, 1, 1, 1)))
-
-        button_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
-        yes_btn = Button(text='Submit', color=(1, 1, 1, 1), background_color=(0, 0.5, 0, 1))
-        no_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.8, 0, 0, 1))
-        button_layout.add_widget(yes_btn)
-        button_layout.add_widget(no_btn)
-        content.add_widget(button_layout)
-
-        popup = Popup(title='Confirm Submission', content=content, size_hint=(0.8, 0.4))
-
-        def do_submit(instance):
+        def do_submit():
             log = {
                 "Habits": {habit: btn.state == 'down' for habit, btn in self.habit_states.items()},
                 "Energy": self.energy_spinner.text,
                 "Completion": str(int(completion_percentage))
             }
             self.app.submit_log(log)
-            popup.dismiss()
 
-        yes_btn.bind(on_press=do_submit)
-        no_btn.bind(on_press=popup.dismiss)
-        popup.open()
+        self.app.dialogs.confirm(
+            'Confirm Submission',
+            f'Completion: {int(completion_percentage)}%\nEnergy: {self.energy_spinner.text}\n\nSubmit this log?',
+            do_submit, confirm_text='Submit', cancel_text='Cancel',
+            confirm_color=(0, 0.5, 0, 1), cancel_color=(0.8, 0, 0, 1))
 
 
 class JournalScreen(Screen):
@@ -323,6 +2473,9 @@ class JournalScreen(Screen):
         self.app = app
         self.current_question_idx = 0
         self.answer_widgets = {}
+        self.question_widgets = []
+        # app.questions_version the question widgets were created for
+        self.questions_version = None
         Clock.schedule_once(self.build_ui, 0)
 
     def build_ui(self, dt=None):
@@ -595,11 +2748,22 @@ class JournalScreen(Screen):
             self.show_question(self.current_question_idx)
 
     def on_pre_enter(self):
-        today_str = datetime.today().strftime("%Y-%m-%d")
-        self.create_question_widgets()
+        # The question widgets are only recreated after the questions change
+        if self.questions_version != self.app.questions_version:
+            self.create_question_widgets()
+            self.questions_version = self.app.questions_version
         self.current_question_idx = 0
         self.show_question(0)
-
+        self.clear_answers()
+        if not self.app.history_ready.done():
+            self.journal_input.hint_text = 'Loading today\'s journal...'
+        self.app.when_history_loaded(self.load_today)
+
+    def load_today(self):
+        self.journal_input.hint_text = 'Write your thoughts here...'
+        if self.manager is None or self.manager.current != self.name:
+            return
+        today_str = datetime.today().strftime("%Y-%m-%d")
         # Check if journal data exists
         if today_str in self.app.data["day_logs"]:
             journal_data = self.app.data["day_logs"][today_str].get("Journal", {})
@@ -615,24 +2779,39 @@ class JournalScreen(Screen):
                     answers = journal_data["answers"]
                     for answer in answers:
                         idx = answer["question_idx"]
-                        if idx < len(self.answer_widgets):
+                        if idx in self.answer_widgets:
                             q_type = self.app.data["reminder_settings"]["journal_questions"][idx]["type"]
 
                             if q_type == "FreeText":
                                 self.answer_widgets[idx].text = answer.get("text", "")
-                        elif q_type == "MultipleChoice":
-                            selected_idx = answer.get("selected", -1)
-                            if 0 <= selected_idx < len(self.answer_widgets[idx]):
-                                self.answer_widgets[idx][selected_idx].active = True
-                        elif q_type == "MultipleChoiceOrText":
-                            selected_idx = answer.get("selected", -1)
-                            if 0 <= selected_idx < len(self.answer_widgets[idx][0]):  # option_widgets
-                                self.answer_widgets[idx][0][selected_idx].active = True
-                                # If "Other" was selected, load the text
-                                if selected_idx == len(self.answer_widgets[idx][0]) - 1:
-                                    self.answer_widgets[idx][1].text = answer.get("text", "")
+                            elif q_type == "MultipleChoice":
+                                selected_idx = answer.get("selected", -1)
+                                if 0 <= selected_idx < len(self.answer_widgets[idx]):
+                                    self.answer_widgets[idx][selected_idx].active = True
+                            elif q_type == "MultipleChoiceOrText":
+                                selected_idx = answer.get("selected", -1)
+                                if 0 <= selected_idx < len(self.answer_widgets[idx][0]):  # option_widgets
+                                    self.answer_widgets[idx][0][selected_idx].active = True
+                                    # If "Other" was selected, load the text
+                                    if selected_idx == len(self.answer_widgets[idx][0]) - 1:
+                                        self.answer_widgets[idx][1].text = answer.get("text", "")
+
+    def clear_answers(self):
+        """Reset the cached answer widgets to blank, as freshly created ones would be"""
+        for widgets in self.answer_widgets.values():
+            if isinstance(widgets, TextInput):
+                widgets.text = ""
+                continue
+            if isinstance(widgets, tuple):
+                widgets, other_input = widgets
+                other_input.text = ""
+            for checkbox in widgets:
+                checkbox.active = False
 
     def save_journal(self, instance):
+        if not self.app.history_ready.done():
+            self.app.when_history_loaded(lambda: self.save_journal(instance))
+            return
         today_str = datetime.today().strftime("%Y-%m-%d")
         if today_str not in self.app.data["day_logs"]:
             self.app.show_popup("Please submit your habits first!")
@@ -730,7 +2909,8 @@ class JournalScreen(Screen):
         }
 
         self.app.data["day_logs"][today_str]["Journal"] = journal_data
-        save_data(self.app.data)
+        self.app.search_index.update_day(self.app.data, today_str)
+        self.app.save_coordinator.mark_dirty([("day_logs", today_str)])
         self.app.show_popup("Journal saved!")
         self.app.sm.current = 'audio'
         Clock.schedule_once(lambda dt: self.app.play_random_audio(), 0.1)
@@ -881,7 +3061,7 @@ class JournalQuestionManager(Screen):
                 return
 
         self.app.data["reminder_settings"]["journal_questions"].append(question)
-        save_data(self.app.data)
+        self.app.save_coordinator.mark_dirty([("reminder_settings", "journal_questions")])
         self.update_questions_display()
         popup.dismiss()
         self.app.show_popup("Question added!")
@@ -914,7 +3094,7 @@ class JournalQuestionManager(Screen):
                 if new_text:
                     # Update the question text in the correct location
                     self.app.data["reminder_settings"]["journal_questions"][index]['text'] = new_text
-                    save_data(self.app.data)
+                    self.app.save_coordinator.mark_dirty([("reminder_settings", "journal_questions")])
                     self.update_questions_display()
                     popup.dismiss()
                     self.app.show_popup("Question updated!")
@@ -929,30 +3109,17 @@ class JournalQuestionManager(Screen):
 
     def confirm_delete_question(self, index):
         question = self.app.data["reminder_settings"]["journal_questions"][index]
-        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        content.add_widget(Label(text=f'Delete this question?\n\n"{question["text"]}"',
-                                 color=(1, 1, 1, 1)))
 
-        btn_layout = BoxLayout(spacing=10, size_hint_y=0.4)
-        yes_btn = Button(text='Delete', color=(1, 1, 1, 1), background_color=(0.8, 0, 0, 1))
-        no_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        btn_layout.add_widget(yes_btn)
-        btn_layout.add_widget(no_btn)
-        content.add_widget(btn_layout)
-
-        popup = Popup(title='Confirm Deletion', content=content, size_hint=(0.8, 0.4))
-
-        def delete_question(instance):
+        def delete_question():
             # Remove the question
             del self.app.data["reminder_settings"]["journal_questions"][index]
-            save_data(self.app.data)
+            self.app.save_coordinator.mark_dirty([("reminder_settings", "journal_questions")])
             self.update_questions_display()
-            popup.dismiss()
             self.app.show_popup("Question deleted!")
 
-        yes_btn.bind(on_press=delete_question)
-        no_btn.bind(on_press=popup.dismiss)
-        popup.open()
+        self.app.dialogs.confirm('Confirm Deletion', f'Delete this question?\n\n"{question["text"]}"',
+                                 delete_question, confirm_text='Delete', cancel_text='Cancel',
+                                 confirm_color=(0.8, 0, 0, 1))
 
 
 
@@ -976,11 +3143,140 @@ class SelectableRecycleBoxLayout(FocusBehavior, LayoutSelectionBehavior, Recycle
     pass
 
 
+def update_rows(rv, rows):
+    """Make rv.data equal rows, replacing only the span between their common head and tail"""
+    data = rv.data
+    limit = min(len(data), len(rows))
+    head = 0
+    while head < limit and data[head] == rows[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and data[-1 - tail] == rows[-1 - tail]:
+        tail += 1
+    old_end, new_end = len(data) - tail, len(rows) - tail
+    if old_end == head and new_end == head + 1:
+        data.insert(head, rows[head])
+    elif old_end == head + 1 and new_end == head:
+        del data[head]
+    elif old_end == new_end > head:
+        data[head:old_end] = rows[head:new_end]
+    elif old_end != new_end:
+        rv.data = rows
+
+
+class DetailCache:
+    """Formatted detail text and rendered textures per day, keyed by a version stamp"""
+
+    def __init__(self, texture_limit=DETAIL_TEXTURE_LIMIT):
+        self.texture_limit = texture_limit
+        self.texts = {}
+        # date -> (stamp, width, texture), least recently used first
+        self.textures = OrderedDict()
+
+    def text(self, date_str, stamp, build):
+        cached = self.texts.get(date_str)
+        if cached is None or cached[0] != stamp:
+            cached = self.texts[date_str] = (stamp, build())
+        return cached[1]
+
+    def texture(self, date_str, stamp, text, width):
+        cached = self.textures.get(date_str)
+        if cached is not None and cached[0] == stamp and cached[1] == width:
+            self.textures.move_to_end(date_str)
+            return cached[2]
+        label = CoreLabel(text=text, text_size=(width, None), halign='left', valign='top',
+                          padding=(10, 10), font_size=sp(15), color=(0.9, 0.9, 0.9, 1))
+        label.refresh()
+        self.textures[date_str] = (stamp, width, label.texture)
+        self.textures.move_to_end(date_str)
+        while len(self.textures) > self.texture_limit:
+            self.textures.popitem(last=False)
+        return label.texture
+
+    def discard(self, date_str):
+        self.texts.pop(date_str, None)
+        self.textures.pop(date_str, None)
+
+    def clear(self):
+        self.texts.clear()
+        self.textures.clear()
+
+
+class HistoryEntry(RecycleDataViewBehavior, BoxLayout):
+    """Row view for one day in HistoryScreen's RecycleView"""
+    entry_date = StringProperty("")
+    day_text = StringProperty("")
+    details = StringProperty("")
+    details_stamp = NumericProperty(0)
+    expanded = BooleanProperty(False)
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', padding=5, **kwargs)
+        self.index = None
+        self.rv = None
+
+        # Header (always visible)
+        header = BoxLayout(size_hint_y=None, height=40)
+        self.date_label = Label(size_hint_x=0.6, color=(1, 1, 1, 1), halign='left')
+        self.day_label = Label(size_hint_x=0.2)
+        self.expand_btn = Button(text='▼', size_hint_x=0.2, font_size=16)
+        self.expand_btn.bind(on_press=lambda instance: self.rv.screen.toggle_expand(self.index))
+        header.add_widget(self.date_label)
+        header.add_widget(self.day_label)
+        header.add_widget(self.expand_btn)
+        self.add_widget(header)
+
+        # Details (hidden by default), drawn from DetailCache's texture
+        self.details_scroll = ScrollView(size_hint_y=None, height=0)
+        self.details_view = Widget(size_hint=(None, None), size=(0, 0))
+        with self.details_view.canvas:
+            Color(1, 1, 1, 1)
+            self.details_rect = Rectangle()
+        self.details_view.bind(pos=lambda instance, pos: setattr(self.details_rect, 'pos', pos))
+        self.details_scroll.add_widget(self.details_view)
+        self.add_widget(self.details_scroll)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.rv = rv
+        super().refresh_view_attrs(rv, index, data)
+        self.date_label.text = self.entry_date
+        self.day_label.text = self.day_text
+        self.expand_btn.text = '▲' if self.expanded else '▼'
+        self.details_scroll.height = 300 if self.expanded else 0
+        texture = None
+        if self.expanded:
+            texture = rv.screen.detail_cache.texture(self.entry_date, self.details_stamp, self.details,
+                                                     int(Window.width * 0.95))
+        self.details_rect.texture = texture
+        self.details_rect.size = self.details_view.size = texture.size if texture else (0, 0)
+        self.details_scroll.scroll_y = 1
+
+
 class HistoryScreen(Screen):
     def __init__(self, app, **kwargs):
         super().__init__(**kwargs)
         self.app = app
         self.filter_text = ""
+        self.waiting_for_history = False
+        self.search_synced = False
+        # Whether history_list reflects day_logs, kept so by on_day_log_changed
+        self.history_shown = False
+        self.detail_cache = DetailCache()
+        # Version stamps for DetailCache: a day gets a fresh one on every change,
+        # and every day falls back to base_version, renewed when questions change
+        self.version_counter = 0
+        self.base_version = 0
+        self.log_versions = {}
+        # Ordinals (ascending) of matching days older than the shown months, and
+        # the first day of the oldest month shown
+        self.remaining = array('i')
+        self.shown_from = 0
+        self.page_loading = False
+        self.history_builder = None
+        self.search_trigger = Clock.create_trigger(self.update_history, SEARCH_DELAY)
+        self.app.bind(on_day_log_changed=self.on_day_log_changed,
+                      on_history_invalidated=self.on_history_invalidated)
         Clock.schedule_once(self.build_ui, 0)
 
     def build_ui(self, dt=None):
@@ -990,7 +3286,7 @@ class HistoryScreen(Screen):
 
         # Search bar
         search_layout = BoxLayout(size_hint_y=0.1, spacing=10)
-        self.search_input = TextInput(hint_text='Search journal entries...', multiline=False,
+        self.search_input = TextInput(hint_text='Search, e.g. habit:Read done:no energy>=7 date:2026-05', multiline=False,
                                       foreground_color=(1, 1, 1, 1), background_color=(0.15, 0.15, 0.15, 1))
         self.search_input.bind(text=self.on_search_text)
         search_btn = Button(text='Search', size_hint_x=0.3, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
@@ -999,17 +3295,24 @@ class HistoryScreen(Screen):
         search_layout.add_widget(search_btn)
         layout.add_widget(search_layout)
 
-        # History container with expandable entries
-        scroll = ScrollView(size_hint_y=0.7)
-        self.history_container = BoxLayout(
+        # History list with expandable entries; only the visible rows exist as widgets
+        self.history_list = RecycleView(size_hint_y=0.7)
+        self.history_list.screen = self
+        history_layout = SelectableRecycleBoxLayout(
             orientation='vertical',
             spacing=10,
             size_hint_y=None,
-            padding=5
+            padding=5,
+            default_size=(None, 100),
+            default_size_hint=(1, None),
+            viewclass='HistoryEntry',
+            key_viewclass='viewclass'
         )
-        self.history_container.bind(minimum_height=self.history_container.setter('height'))
-        scroll.add_widget(self.history_container)
-        layout.add_widget(scroll)
+        history_layout.bind(minimum_height=history_layout.setter('height'))
+        history_layout.bind(height=self.on_history_scroll)
+        self.history_list.bind(scroll_y=self.on_history_scroll, height=self.on_history_scroll)
+        self.history_list.add_widget(history_layout)
+        layout.add_widget(self.history_list)
 
         # Buttons
         btn_layout = BoxLayout(size_hint_y=0.1, spacing=10)
@@ -1025,210 +3328,309 @@ class HistoryScreen(Screen):
 
     def on_search_text(self, instance, value):
         self.filter_text = value.lower()
-        self.update_history()
+        self.search_trigger()
 
     def on_pre_enter(self):
-        self.update_history()
-
-    def update_history(self, dt=None):
-        self.history_container.clear_widgets()
+        # Journal questions or habit names may have changed while away
+        self.search_synced = False
+        if not self.history_shown:
+            self.update_history()
+
+    def on_history_invalidated(self, app):
+        self.history_shown = False
+        self.version_counter += 1
+        self.base_version = self.version_counter
+        self.log_versions.clear()
+        self.detail_cache.clear()
+        if self.manager is not None and self.manager.current_screen is self:
+            self.update_history()
+
+    def on_day_log_changed(self, app, date_str):
+        """Insert, refresh or drop the one row for date_str"""
+        self.version_counter += 1
+        self.log_versions[date_str] = self.version_counter
+        self.detail_cache.discard(date_str)
+        if self.history_builder is not None and self.history_builder.running:
+            # Rows already built may be stale, start the page over
+            self.update_history()
+            return
+        if not self.history_shown:
+            return
         day_logs = self.app.data.get("day_logs", {})
+        ordinal = date_ordinal(date_str)
+        if self.remaining and ordinal is not None and ordinal < self.shown_from:
+            # Not paged in yet, it only needs the right place in remaining
+            i = bisect_left(self.remaining, ordinal)
+            found = i < len(self.remaining) and self.remaining[i] == ordinal
+            if date_str in day_logs and self.entry_matches(date_str):
+                if not found:
+                    self.remaining.insert(i, ordinal)
+            elif found:
+                del self.remaining[i]
+            if self.page_loading:
+                self.request_page()
+            return
+        index, found = self.entry_index(date_str)
+        if date_str in day_logs and self.entry_matches(date_str):
+            expanded = found and self.history_list.data[index]["expanded"]
+            entry = self.entry_data(date_str, day_logs[date_str], expanded)
+            if found:
+                self.history_list.data[index] = entry
+            else:
+                self.history_list.data.insert(index, entry)
+        elif found:
+            del self.history_list.data[index]
+
+    def entry_index(self, date_str):
+        """Binary search of the newest-first rows: (index, whether date_str is there)"""
+        data = self.history_list.data
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[mid].get("entry_date", "") > date_str:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo, lo < len(data) and data[lo].get("entry_date") == date_str
 
-        for date, log in sorted(day_logs.items(), reverse=True):
-            if self.filter_text and not self.matches_search(log, self.filter_text):
-                continue
+    def entry_matches(self, date_str):
+        """Test one day against the current filter, straight from the day log rather than the search index"""
+        if not self.filter_text:
+            return True
+        query = parse_query(self.filter_text)
+        ordinal = date_ordinal(date_str)
+        if (query.first is not None and ordinal < query.first) or (query.last is not None and ordinal > query.last):
+            return False
+        habit_masks = query_habit_masks(self.app.data, query)
+        questions = self.app.data["reminder_settings"].get("journal_questions", [])
+        return habit_masks is not None and day_query_matches(compact_day_logs(self.app.data), date_str, query,
+                                                             habit_masks, questions)
+
+    def on_leave(self):
+        self.search_trigger.cancel()
+        search_worker.cancel()
+        if self.history_builder is not None and self.history_builder.running:
+            # Unfinished, so on_pre_enter builds it again
+            self.history_builder.cancel()
+        if self.page_loading:
+            self.page_loading = False
+            self.drop_spinner()
 
-            entry_box = BoxLayout(
-                orientation='vertical',
-                size_hint_y=None,
-                height=100,  # Initial height
-                padding=5
-            )
-            entry_box.entry_data = log  # Store log data
-            entry_box.expanded = False  # Track expansion state
+    def update_history(self, dt=None):
+        self.search_trigger.cancel()
+        self.history_shown = False
+        if self.history_builder is not None:
+            self.history_builder.cancel()
+        if not self.app.history_ready.done():
+            self.history_list.data = [{"viewclass": "SelectableLabel", "text": "Loading history...",
+                                       "selectable": False, "height": 40, "color": (1, 1, 1, 1)}]
+            if not self.waiting_for_history:
+                self.waiting_for_history = True
+                self.app.history_ready.add_done_callback(
+                    lambda future: Clock.schedule_once(self.on_history_loaded, 0))
+            return
+        if self.filter_text:
+            # The current entries stay up until the results arrive
+            query = self.filter_text
+            search_worker.submit(lambda is_cancelled: self.search_history(query, is_cancelled), self.show_history)
+        else:
+            search_worker.cancel()
+            day_logs = self.app.data.get("day_logs", {})
+            self.show_history(date_index(day_logs).between())
+
+    def search_history(self, query, is_cancelled):
+        """Runs on search_worker: ordinals of the days matching query, ascending, or None once cancelled"""
+        if not self.search_synced:
+            self.app.search_index.sync(self.app.data)
+            self.search_synced = True
+        if is_cancelled():
+            return None
+        dates = query_history(self.app.data, query, self.app.search_index, is_cancelled)
+        if dates is None:
+            return None
+        return array('i', [date_ordinal(date_str) for date_str in reversed(dates)])
+
+    def show_history(self, ordinals):
+        """Show the newest month of ordinals now, older months as the list is scrolled to the end"""
+        self.page_loading = False
+        self.remaining = ordinals
+        start = self.page_start()
+        page = self.remaining[start:]
+        self.remaining = self.remaining[:start]
+        self.history_list.data = []
+        self.history_list.scroll_y = 1
+
+        # Rows are handed to the RecycleView once per frame
+        entries = []
+
+        def flush(done=None):
+            self.history_list.data.extend(entries)
+            entries.clear()
+
+        def finish():
+            flush()
+            self.history_shown = True
+
+        def add_entry(ordinal):
+            entry = self.page_entry(ordinal)
+            if entry is not None:
+                entries.append(entry)
+
+        self.history_builder = ChunkedBuilder((lambda ordinal=ordinal: add_entry(ordinal) for ordinal in reversed(page)),
+                                              on_progress=flush, on_done=finish)
+
+    def page_start(self):
+        """Index in remaining where its newest month starts, which becomes shown_from"""
+        if not self.remaining:
+            return 0
+        self.shown_from = month_start(self.remaining[-1])
+        return bisect_left(self.remaining, self.shown_from)
+
+    def page_entries(self, ordinals):
+        entries = (self.page_entry(ordinal) for ordinal in reversed(ordinals))
+        return [entry for entry in entries if entry is not None]
+
+    def page_entry(self, ordinal):
+        date_str = ordinal_date(ordinal)
+        log = day_log_snapshot(self.app.data.get("day_logs", {}), date_str)
+        return None if log is None else self.entry_data(date_str, log)
+
+    def on_history_scroll(self, *args):
+        # scroll_y is 0 at the end of the list; a list shorter than the view counts as scrolled there
+        if not self.history_shown or self.page_loading or not self.remaining:
+            return
+        if self.history_list.scroll_y <= 0.1 or self.history_list.layout_manager.height <= self.history_list.height:
+            self.page_loading = True
+            self.history_list.data.append({"viewclass": "SelectableLabel", "text": "Loading older entries...",
+                                           "selectable": False, "height": 40, "color": (1, 1, 1, 1),
+                                           "entry_date": ""})
+            self.request_page()
+
+    def request_page(self):
+        """Prepare the next month's rows on search_worker; a newer request supersedes it"""
+        start = self.page_start()
+        page = self.remaining[start:]
+        search_worker.submit(lambda is_cancelled: (start, self.page_entries(page)), self.show_page)
+
+    def show_page(self, page):
+        start, entries = page
+        self.page_loading = False
+        self.drop_spinner()
+        self.remaining = self.remaining[:start]
+        self.history_list.data.extend(entries)
+
+    def drop_spinner(self):
+        data = self.history_list.data
+        if data and data[-1].get("viewclass") == "SelectableLabel" and data[-1].get("entry_date") == "":
+            data.pop()
+
+    def entry_data(self, date_str, log, expanded=False):
+        entry = {
+            "entry_date": date_str,
+            "day_text": f"Day: {log.get('DayNumber', '')}",
+            "expanded": expanded,
+            "details": "",
+            "details_stamp": self.log_versions.get(date_str, self.base_version),
+            "height": 400 if expanded else 100,
+        }
+        if expanded:
+            questions = self.app.data["reminder_settings"]["journal_questions"]
+            entry["details"] = self.detail_cache.text(date_str, entry["details_stamp"],
+                                                      lambda: day_details_text(log, questions))
+        return entry
+
+    def on_history_loaded(self, dt):
+        self.waiting_for_history = False
+        self.update_history()
 
-            # Header (always visible)
-            header = BoxLayout(size_hint_y=None, height=40)
-            date_label = Label(text=date, size_hint_x=0.6, color=(1, 1, 1, 1), halign='left')
+    def toggle_expand(self, index):
+        entry = self.history_list.data[index]
+        log = self.app.data["day_logs"][entry["entry_date"]]
+        # Replacing the one item only re-lays out that row
+        self.history_list.data[index] = self.entry_data(entry["entry_date"], log, not entry["expanded"])
 
-            # Store reference to expand button directly
-            expand_btn = Button(text='▼', size_hint_x=0.2, font_size=16)
-            entry_box.expand_btn = expand_btn  # Store reference here
+    def refresh_history(self, instance):
+        self.update_history()
 
-            header.add_widget(date_label)
-            header.add_widget(Label(text=f"Day: {log.get('DayNumber', '')}", size_hint_x=0.2))
-            header.add_widget(expand_btn)
-            entry_box.add_widget(header)
 
-            # Details (hidden by default)
-            details_container = BoxLayout(
-                orientation='vertical',
-                size_hint_y=None,
-                height=0  # Start collapsed
-            )
-            entry_box.details_container = details_container
-            entry_box.add_widget(details_container)
-
-            # Bind button here after creating it
-            expand_btn.bind(on_press=lambda instance, box=entry_box: self.toggle_expand(box))
-
-            self.history_container.add_widget(entry_box)
-
-    def toggle_expand(self, entry_box):
-        entry_box.expanded = not entry_box.expanded
-        if entry_box.expanded:
-            # Expand and load details
-            entry_box.details_container.height = 300
-            entry_box.height = 400
-            entry_box.expand_btn.text = '▲'  # Use stored reference
-            self.populate_details(entry_box.details_container, entry_box.entry_data)
-        else:
-            # Collapse
-            entry_box.details_container.height = 0
-            entry_box.height = 100
-            entry_box.expand_btn.text = '▼'  # Use stored reference
+class HabitSettingsRow(RecycleDataViewBehavior, BoxLayout):
+    """Row view for one habit in SettingsScreen's habit list"""
+    habit_name = StringProperty("")
+    points = NumericProperty(0)
 
-    def populate_details(self, container, log):
-        container.clear_widgets()
+    def __init__(self, **kwargs):
+        super().__init__(orientation='horizontal', spacing=10, **kwargs)
+        self.rv = None
+        self.label = Label(font_size=12, text_size=(None, None), color=(1, 1, 1, 1))
+        self.add_widget(self.label)
 
-        # Create scrollable content area
-        details_scroll = ScrollView()
-        content_layout = BoxLayout(
-            orientation='vertical',
-            size_hint_y=None,
-            padding=10
-        )
-        content_layout.bind(minimum_height=content_layout.setter('height'))
-
-        # Add log details
-        details = [
-            f"Completion: {log.get('Completion', '')}%",
-            f"Energy: {log.get('Energy', '')}",
-            "Habits:"
-        ]
-
-        # Add habits with status indicators
-        habits = log.get("Habits", {})
-        for habit, completed in habits.items():
-            status = "✓" if completed else "✗"
-            details.append(f"  {status} {habit}")
-
-        # Add journal if exists
-        journal = log.get("Journal", {})
-        if journal:
-            details.append("\nJournal:")
-            if isinstance(journal, str):
-                details.append(journal)
-            else:
-                # Free text
-                if journal.get("free_text"):
-                    details.append(f"  {journal['free_text']}")
-
-                # Questions
-                for i, answer in enumerate(journal.get("answers", [])):
-                    question = self.app.data["reminder_settings"]["journal_questions"][answer["question_idx"]]
-                    q_text = question["text"]
-
-                    if question["type"] == "FreeText":
-                        details.append(f"  Q: {q_text}")
-                        details.append(f"    A: {answer.get('text', '')}")
-                    elif question["type"] == "MultipleChoice":
-                        details.append(f"  Q: {q_text}")
-                        selected_idx = answer.get("selected", -1)
-                        if 0 <= selected_idx < len(question["options"]):
-                            details.append(f"    A: {question['options'][selected_idx]}")
-                    elif question["type"] == "MultipleChoiceOrText":
-                        details.append(f"  Q: {q_text}")
-                        selected_idx = answer.get("selected", -1)
-                        if 0 <= selected_idx < len(question["options"]):
-                            if selected_idx == len(question["options"]) - 1:  # "Other" option
-                                details.append(f"    A: {answer.get('text', '')}")
-                            else:
-                                details.append(f"    A: {question['options'][selected_idx]}")
-                    elif question["type"] == "MultipleChoiceOrText":
-                        details.append(f"  Q: {q_text}")
-
-                        # Show selected options
-                        if answer.get("selected"):
-                            selected_text = ", ".join(question['options'][i] for i in answer["selected"])
-                            details.append(f"    Selected: {selected_text}")
-
-                        # Show additional text
-                        if answer.get("text"):
-                            details.append(f"    Notes: {answer['text']}")
-
-        # Create content label
-        content_label = Label(
-            text="\n".join(details),
-            size_hint_y=None,
-            text_size=(Window.width * 0.95, None),
-            halign='left',
-            valign='top',
-            color=(0.9, 0.9, 0.9, 1)
-        )
-        content_label.bind(texture_size=content_label.setter('size'))
-        content_layout.add_widget(content_label)
-        details_scroll.add_widget(content_layout)
-        container.add_widget(details_scroll)
-
-    def matches_search(self, log, search_text):
-        search_text = search_text.lower()
-
-        # Check basic fields
-        basic_fields = ["Completion", "Energy", "DayNumber"]
-        for field in basic_fields:
-            if field in log and search_text in str(log[field]).lower():
-                return True
+        # Edit button
+        edit_btn = Button(text='Edit', size_hint_x=0.2, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
+        edit_btn.bind(on_press=lambda instance: self.rv.screen.edit_habit(self.habit_name))
+        self.add_widget(edit_btn)
 
-        # Check habits
-        habits = log.get("Habits", {})
-        for habit, completed in habits.items():
-            if search_text in habit.lower():
-                return True
+        # Remove button
+        remove_btn = Button(text='Remove', size_hint_x=0.3, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
+        remove_btn.bind(on_press=lambda instance: self.rv.screen.confirm_remove_habit(self.habit_name))
+        self.add_widget(remove_btn)
 
-        # Check journal
-        journal = log.get("Journal", {})
-        if journal:
-            if isinstance(journal, str):
-                if search_text in journal.lower():
-                    return True
-            else:
-                # Free text
-                if "free_text" in journal and search_text in journal["free_text"].lower():
-                    return True
-
-                # Questions and answers
-                for answer in journal.get("answers", []):
-                    question_idx = answer.get("question_idx", -1)
-                    if 0 <= question_idx < len(self.app.data["reminder_settings"]["journal_questions"]):
-                        question = self.app.data["reminder_settings"]["journal_questions"][question_idx]
-                        # Check question text
-                        if search_text in question["text"].lower():
-                            return True
-
-                        # Check answer
-                        if question["type"] == "FreeText":
-                            if "text" in answer and search_text in answer["text"].lower():
-                                return True
-                        elif question["type"] == "MultipleChoice":
-                            selected_idx = answer.get("selected", -1)
-                            if 0 <= selected_idx < len(question["options"]):
-                                if search_text in question["options"][selected_idx].lower():
-                                    return True
-                        elif question["type"] == "MultipleChoiceOrText":
-                            selected_idx = answer.get("selected", -1)
-                            if 0 <= selected_idx < len(question["options"]):
-                                if selected_idx == len(question["options"]) - 1:  # "Other" option
-                                    if "text" in answer and search_text in answer["text"].lower():
-                                        return True
-                                else:
-                                    if search_text in question["options"][selected_idx].lower():
-                                        return True
+    def refresh_view_attrs(self, rv, index, data):
+        self.rv = rv
+        super().refresh_view_attrs(rv, index, data)
+        self.label.text = f"{self.habit_name} ({self.points} pts)"
+
+
+class HabitReminderRow(RecycleDataViewBehavior, BoxLayout):
+    """Row view for one habit's reminder toggle in SettingsScreen"""
+    habit_name = StringProperty("")
+    enabled = BooleanProperty(True)
+
+    def __init__(self, **kwargs):
+        super().__init__(spacing=10, **kwargs)
+        self.rv = None
+        self.habit = None
+        self.label = Label(color=(1, 1, 1, 1), size_hint_x=0.7)
+        self.add_widget(self.label)
+        self.toggle = ToggleButton(size_hint_x=0.3, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
+        # on_press rather than state, which also changes when a recycled row is refreshed
+        self.toggle.bind(on_press=lambda instance: self.rv.screen.toggle_habit_reminder(self.habit, instance.state))
+        self.add_widget(self.toggle)
 
-        return False
+    def refresh_view_attrs(self, rv, index, data):
+        self.rv = rv
+        super().refresh_view_attrs(rv, index, data)
+        self.label.text = self.habit_name
+        self.toggle.state = 'down' if self.enabled else 'normal'
+        self.toggle.text = 'On' if self.enabled else 'Off'
+
+
+class NotificationRow(RecycleDataViewBehavior, BoxLayout):
+    """Row view for one entry in SettingsScreen's notification history"""
+    timestamp = StringProperty("")
+    ntype = StringProperty("")
+    message = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='vertical', padding=5, **kwargs)
+
+        # Header with timestamp and type
+        header = BoxLayout(size_hint_y=0.4)
+        self.timestamp_label = Label(color=(0.8, 0.8, 0.8, 1), size_hint_x=0.7, halign='left')
+        self.type_label = Label(color=(0.5, 0.8, 1, 1), size_hint_x=0.3, halign='right')
+        header.add_widget(self.timestamp_label)
+        header.add_widget(self.type_label)
+        self.add_widget(header)
+
+        # Notification message
+        self.message_label = Label(color=(1, 1, 1, 1), size_hint_y=0.6, halign='left', valign='top')
+        self.add_widget(self.message_label)
 
-    def refresh_history(self, instance):
-        self.update_history()
+    def refresh_view_attrs(self, rv, index, data):
+        super().refresh_view_attrs(rv, index, data)
+        self.timestamp_label.text = self.timestamp
+        self.type_label.text = self.ntype
+        self.message_label.text_size = (Window.width * 0.9, None)
+        self.message_label.text = self.message
 
 
 class SettingsScreen(Screen):
@@ -1248,10 +3650,9 @@ class SettingsScreen(Screen):
         habits_title = Label(text='Manage Habits', font_size=20, size_hint_y=None, height=50, color=(1, 1, 1, 1))
         layout.add_widget(habits_title)
 
-        self.habits_layout = BoxLayout(orientation='vertical', spacing=5, size_hint_y=None)
-        self.habits_layout.bind(minimum_height=self.habits_layout.setter('height'))
+        self.habits_list = self.recycle_list('HabitSettingsRow', 50, 400)
         self.update_habits_display()
-        layout.add_widget(self.habits_layout)
+        layout.add_widget(self.habits_list)
 
         add_habit_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
         self.new_habit_input = TextInput(hint_text='New Habit', multiline=False, size_hint_x=0.5,
@@ -1306,12 +3707,9 @@ class SettingsScreen(Screen):
                                      color=(1, 1, 1, 1))
         layout.add_widget(habit_reminder_title)
 
-        scroll_habits = ScrollView(size_hint_y=0.3)
-        self.habit_reminder_layout = GridLayout(cols=1, spacing=5, size_hint_y=None)
-        self.habit_reminder_layout.bind(minimum_height=self.habit_reminder_layout.setter('height'))
+        self.habit_reminder_list = self.recycle_list('HabitReminderRow', 50, 300)
         self.update_habit_reminders()
-        scroll_habits.add_widget(self.habit_reminder_layout)
-        layout.add_widget(scroll_habits)
+        layout.add_widget(self.habit_reminder_list)
 
         # Add Journal Questions section
         jq_title = Label(text='Journal Questions', font_size=20, size_hint_y=None, height=50, color=(1, 1, 1, 1))
@@ -1364,102 +3762,75 @@ class SettingsScreen(Screen):
         clear_btn.bind(on_press=self.clear_notification_history)
         layout.add_widget(clear_btn)
 
-        # Notification history scroll view
-        history_scroll = ScrollView(size_hint_y=0.4)
-        self.history_container = GridLayout(
-            cols=1,
-            spacing=5,
-            size_hint_y=None,
-            padding=5
-        )
-        self.history_container.bind(minimum_height=self.history_container.setter('height'))
+        # Notification history list
+        self.notification_list = self.recycle_list('NotificationRow', 80, 400)
         self.update_notification_history()
-        history_scroll.add_widget(self.history_container)
-        layout.add_widget(history_scroll)
+        layout.add_widget(self.notification_list)
 
         scroll.add_widget(layout)
         self.add_widget(scroll)
 
+    def recycle_list(self, viewclass, row_height, max_height):
+        """A RecycleView of viewclass rows that grows with its rows up to max_height"""
+        rv = RecycleView(size_hint_y=None, height=0)
+        rv.screen = self
+        rows_layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=5,
+            size_hint_y=None,
+            default_size=(None, row_height),
+            default_size_hint=(1, None),
+            viewclass=viewclass,
+            key_viewclass='viewclass'
+        )
+        rows_layout.bind(minimum_height=rows_layout.setter('height'))
+        rows_layout.bind(minimum_height=lambda instance, height: setattr(rv, 'height', min(height, max_height)))
+        rv.add_widget(rows_layout)
+        return rv
+
     def update_notification_history(self):
         """Populate notification history display"""
-        self.history_container.clear_widgets()
-
-        if not self.app.data.get("notification_history"):
-            self.history_container.add_widget(
-                Label(text="No notifications yet", color=(1, 1, 1, 1))
-            )
-            return
-
-        for note in reversed(self.app.data["notification_history"]):
-            timestamp = note.get("timestamp", "")
-            ntype = note.get("type", "Notification")
-            message = note.get("message", "")
-
-            # Create formatted display
-            box = BoxLayout(
-                orientation='vertical',
-                size_hint_y=None,
-                height=80,
-                padding=5
-            )
-
-            # Header with timestamp and type
-            header = BoxLayout(size_hint_y=0.4)
-            header.add_widget(Label(
-                text=timestamp,
-                color=(0.8, 0.8, 0.8, 1),
-                size_hint_x=0.7,
-                halign='left'
-            ))
-            header.add_widget(Label(
-                text=ntype,
-                color=(0.5, 0.8, 1, 1),
-                size_hint_x=0.3,
-                halign='right'
-            ))
-            box.add_widget(header)
-
-            # Notification message
-            msg_label = Label(
-                text=message,
-                color=(1, 1, 1, 1),
-                size_hint_y=0.6,
-                halign='left',
-                valign='top',
-                text_size=(Window.width * 0.9, None)
-            )
-            box.add_widget(msg_label)
-
-            self.history_container.add_widget(box)
+        rows = [{"timestamp": note.get("timestamp", ""), "ntype": note.get("type", "Notification"),
+                 "message": note.get("message", "")}
+                for note in reversed(self.app.data.get("notification_history", []))]
+        if not rows:
+            rows = [{"viewclass": "SelectableLabel", "text": "No notifications yet", "selectable": False,
+                     "height": 40, "color": (1, 1, 1, 1)}]
+        update_rows(self.notification_list, rows)
 
     def clear_notification_history(self, instance):
         """Clear notification history"""
         self.app.data["notification_history"] = []
-        save_data(self.app.data)
+        self.app.save_coordinator.mark_dirty([("notification_history",)])
         self.update_notification_history()
 
-    def is_habit_enabled(self, habit_name):
+    def is_habit_enabled(self, habit):
         habits_enabled = self.app.data["reminder_settings"]["habits_enabled"]
         # Enable by default if not explicitly set
-        return habits_enabled.get(habit_name, True)
-
-    def toggle_habit_reminder(self, habit_name, state):
-        self.app.data["reminder_settings"]["habits_enabled"][habit_name] = (state == 'down')
-        save_data(self.app.data)
-        self.update_habit_reminders()
+        return habits_enabled.get(habit_key(habit), True)
+
+    def toggle_habit_reminder(self, habit, state):
+        self.app.data["reminder_settings"]["habits_enabled"][habit_key(habit)] = (state == 'down')
+        self.app.save_coordinator.mark_dirty([("reminder_settings", "habits_enabled", habit_key(habit))])
+        # Only this habit's row changes
+        data = self.habit_reminder_list.data
+        for index, row in enumerate(data):
+            if row["habit"] is habit:
+                data[index] = self.reminder_row(habit)
+                break
 
     def toggle_reminders(self, instance, state):
         enabled = (state == 'down')
         self.app.data["reminder_settings"]["enabled"] = enabled
         instance.text = 'On' if enabled else 'Off'
-        save_data(self.app.data)
+        self.app.save_coordinator.mark_dirty([("reminder_settings", "enabled")])
 
         if enabled:
             self.app.schedule_daily_reminder()
 
     def update_reminder_time(self, spinner, text):
         self.app.data["reminder_settings"]["time"] = text
-        save_data(self.app.data)
+        self.app.save_coordinator.mark_dirty([("reminder_settings", "time")])
         self.app.schedule_daily_reminder()
 
     def add_habit(self, instance):
@@ -1473,11 +3844,11 @@ class SettingsScreen(Screen):
                 if any(h["name"] == new_habit_name for h in self.app.data["habits"]):
                     self.app.show_popup("Habit already exists!")
                 else:
-                    new_habit = {"name": new_habit_name, "points": points}
-                    self.app.data["habits"].append(new_habit)
-                    save_data(self.app.data)
+                    self.app.data["habits"].append(new_habit(self.app.data, new_habit_name, points))
+                    self.app.save_coordinator.mark_dirty([("habits",), ("habit_names",)])
                     self.update_habits_display()
-                    self.app.habits_screen.build_ui()
+                    self.update_habit_reminders()
+                    self.app.habits_screen.update_habits()
                     self.app.show_popup(f"Habit '{new_habit_name}' added with {points} points!")
                     self.new_habit_input.text = ""
                     self.points_input.text = ""
@@ -1487,48 +3858,20 @@ class SettingsScreen(Screen):
             self.app.show_popup("Please enter both habit name and points!")
 
     def confirm_remove_habit(self, habit_name):
-        content = BoxLayout(orientation='vertical', spacing=10)
-        content.add_widget(Label(text=f'Are you sure you want to remove "{habit_name}"?', color=(1, 1, 1, 1)))
-        button_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
-        yes_btn = Button(text='Yes', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        no_btn = Button(text='No', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        button_layout.add_widget(yes_btn)
-        button_layout.add_widget(no_btn)
-        content.add_widget(button_layout)
-        popup = Popup(title='Confirm Removal', content=content, size_hint=(0.8, 0.4))
-        yes_btn.bind(on_press=lambda x: self.do_remove_habit(habit_name, popup))
-        no_btn.bind(on_press=lambda x: popup.dismiss())
-        popup.open()
+        self.app.dialogs.confirm('Confirm Removal', f'Are you sure you want to remove "{habit_name}"?',
+                                 lambda: self.do_remove_habit(habit_name))
 
-    def do_remove_habit(self, habit_name, popup):
+    def do_remove_habit(self, habit_name):
         self.app.data["habits"] = [h for h in self.app.data["habits"] if h["name"] != habit_name]
-        save_data(self.app.data)
+        self.app.save_coordinator.mark_dirty([("habits",)])
         self.update_habits_display()
-        self.app.habits_screen.build_ui()
+        self.update_habit_reminders()
+        self.app.habits_screen.update_habits()
         self.app.show_popup(f"Habit '{habit_name}' removed!")
-        popup.dismiss()
 
     def update_habits_display(self):
-        self.habits_layout.clear_widgets()
-        for habit in self.app.data.get("habits", []):
-            habit_name = habit["name"]
-            habit_points = habit["points"]
-            habit_row = BoxLayout(orientation='horizontal', size_hint_y=None, height=50, spacing=10)
-            label = Label(text=f"{habit_name} ({habit_points} pts)", font_size=12, text_size=(None, None),
-                          color=(1, 1, 1, 1))
-            habit_row.add_widget(label)
-
-            # Edit button
-            edit_btn = Button(text='Edit', size_hint_x=0.2, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-            edit_btn.bind(on_press=lambda x, h=habit_name: self.edit_habit(h))
-            habit_row.add_widget(edit_btn)
-
-            # Remove button
-            remove_btn = Button(text='Remove', size_hint_x=0.3, color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-            remove_btn.bind(on_press=lambda x, h=habit_name: self.confirm_remove_habit(h))
-            habit_row.add_widget(remove_btn)
-
-            self.habits_layout.add_widget(habit_row)
+        rows = [{"habit_name": habit["name"], "points": habit["points"]} for habit in self.app.data.get("habits", [])]
+        update_rows(self.habits_list, rows)
 
     def export_data_to_file(self, filename):
         try:
@@ -1536,7 +3879,7 @@ class SettingsScreen(Screen):
             os.makedirs(export_dir, exist_ok=True)
             export_file = os.path.join(export_dir, filename)
             with open(export_file, 'w') as f:
-                json.dump(self.app.data, f, indent=2)
+                json.dump(self.app.data, f, indent=2, default=_legacy_json_default)
             return True
         except Exception as e:
             print(f"Export error: {str(e)}")
@@ -1555,15 +3898,15 @@ class SettingsScreen(Screen):
             if os.path.exists(import_file):
                 with open(import_file, 'r') as f:
                     imported_data = json.load(f)
-                    default_data = get_default_data()
-                    for key in default_data:
-                        if key not in imported_data:
-                            imported_data[key] = default_data[key]
+                    migrate_data(imported_data)
+                    compact_day_logs(imported_data)
                     self.app.data = imported_data
+                    self.app.search_index.reset()
                     self.app.day_num = get_day_number(self.app.data["start_date"])
-                save_data(self.app.data)
+                self.app.save_coordinator.mark_dirty()
                 self.app.show_popup("Data imported successfully!")
                 self.update_habits_display()
+                self.update_habit_reminders()
                 self.app.habits_screen.build_ui()
             else:
                 self.app.show_popup("Export file not found!")
@@ -1571,18 +3914,7 @@ class SettingsScreen(Screen):
             self.app.show_popup(f"Import error: {str(e)}")
 
     def confirm_reset(self, instance):
-        content = BoxLayout(orientation='vertical', spacing=10)
-        content.add_widget(
-            Label(text='Are you sure you want to reset all data?\nThis cannot be undone.', color=(1, 1, 1, 1)))
-        button_layout = BoxLayout(size_hint_y=None, height=50, spacing=10)
-        yes_btn = Button(text='Yes, Reset', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        no_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        button_layout.add_widget(yes_btn)
-        button_layout.add_widget(no_btn)
-        content.add_widget(button_layout)
-        popup = Popup(title='Confirm Reset', content=content, size_hint=(0.8, 0.4))
-
-        def reset_data(btn):
+        def reset_data():
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_file = f'habit_builder_backup_{timestamp}.json'
             if self.export_data_to_file(backup_file):
@@ -1590,15 +3922,16 @@ class SettingsScreen(Screen):
             else:
                 print("Failed to backup data")
             self.app.data = get_default_data()
+            compact_day_logs(self.app.data)
+            self.app.search_index.reset()
             self.app.day_num = 1
-            save_data(self.app.data)
+            self.app.save_coordinator.mark_dirty()
             self.update_habits_display()
-            popup.dismiss()
+            self.update_habit_reminders()
             self.app.show_popup("All data has been reset!")
 
-        yes_btn.bind(on_press=reset_data)
-        no_btn.bind(on_press=lambda x: popup.dismiss())
-        popup.open()
+        self.app.dialogs.confirm('Confirm Reset', 'Are you sure you want to reset all data?\nThis cannot be undone.',
+                                 reset_data, confirm_text='Yes, Reset', cancel_text='Cancel')
 
     def edit_habit(self, habit_name, popup=None):
         content = BoxLayout(orientation='vertical', spacing=10)
@@ -1624,6 +3957,27 @@ class SettingsScreen(Screen):
 
         edit_popup = Popup(title='Edit Habit', content=content, size_hint=(0.8, 0.4))
 
+        def apply_edit(new_name, points, revive):
+            for habit in self.app.data["habits"]:
+                if habit["name"] == habit_name:
+                    if revive:
+                        revive_habit(self.app.data, habit, new_name)
+                    elif new_name != habit_name:
+                        rename_habit(self.app.data, habit, new_name)
+                    habit["points"] = points
+                    break
+            paths = [("habits",), ("habit_names",)]
+            if revive:
+                paths.append(("reminder_settings", "habits_enabled"))
+            self.app.save_coordinator.mark_dirty(paths)
+            self.update_habits_display()
+            self.update_habit_reminders()
+            self.app.habits_screen.update_habits()
+            edit_popup.dismiss()
+            if popup:
+                popup.dismiss()
+            self.app.show_popup(f"Habit updated to '{new_name}' with {points} points!")
+
         def save_edit(instance):
             new_name = self.edit_habit_input.text.strip()
             points_text = self.edit_points_input.text.strip()
@@ -1632,18 +3986,18 @@ class SettingsScreen(Screen):
                     points = int(points_text)
                     if points <= 0:
                         raise ValueError
-                    for habit in self.app.data["habits"]:
-                        if habit["name"] == habit_name:
-                            habit["name"] = new_name
-                            habit["points"] = points
-                            break
-                    save_data(self.app.data)
-                    self.update_habits_display()
-                    self.app.habits_screen.build_ui()
-                    edit_popup.dismiss()
-                    if popup:
-                        popup.dismiss()
-                    self.app.show_popup(f"Habit updated to '{new_name}' with {points} points!")
+                    if new_name != habit_name and any(h["name"] == new_name for h in self.app.data["habits"]):
+                        self.app.show_popup("Habit already exists!")
+                        return
+                    if new_name != habit_name and new_name in self.app.data["habit_names"]:
+                        # A removed habit's name: its ID still labels its past days
+                        self.app.dialogs.confirm(
+                            'Restore History',
+                            f'"{new_name}" was used by a removed habit.\nContinue its history under this habit?\n'
+                            f'Days logged as "{habit_name}" keep that name.',
+                            lambda: apply_edit(new_name, points, True), confirm_text='Continue', cancel_text='Cancel')
+                        return
+                    apply_edit(new_name, points, False)
                 except ValueError:
                     self.app.show_popup("Please enter a valid positive integer for points!")
             else:
@@ -1654,26 +4008,10 @@ class SettingsScreen(Screen):
         edit_popup.open()
 
     def update_habit_reminders(self):
-        self.habit_reminder_layout.clear_widgets()
-        for habit in self.app.data["habits"]:
-            habit_name = habit["name"]
-            row = BoxLayout(size_hint_y=None, height=50, spacing=10)
+        update_rows(self.habit_reminder_list, [self.reminder_row(habit) for habit in self.app.data["habits"]])
 
-            # Habit label
-            row.add_widget(Label(text=habit_name, color=(1, 1, 1, 1), size_hint_x=0.7))
-
-            # Toggle button
-            toggle = ToggleButton(
-                text='On' if self.is_habit_enabled(habit_name) else 'Off',
-                state='down' if self.is_habit_enabled(habit_name) else 'normal',
-                size_hint_x=0.3,
-                color=(1, 1, 1, 1),
-                background_color=(0.3, 0.3, 0.3, 1)
-            )
-            toggle.bind(state=lambda instance, state, h=habit_name: self.toggle_habit_reminder(h, state))
-            row.add_widget(toggle)
-
-            self.habit_reminder_layout.add_widget(row)
+    def reminder_row(self, habit):
+        return {"habit": habit, "habit_name": habit["name"], "enabled": self.is_habit_enabled(habit)}
 
 
 class AudioPlayerScreen(Screen):
@@ -1854,8 +4192,9 @@ class AudioPlayerScreen(Screen):
             # Add completion callback
             def on_complete(sound):
                 # Save data after playback completes
-                self.app.data["day_logs"][datetime.today().strftime("%Y-%m-%d")]["AudioPlayed"] = filename
-                save_data(self.app.data)
+                today_str = datetime.today().strftime("%Y-%m-%d")
+                self.app.data["day_logs"][today_str]["AudioPlayed"] = filename
+                self.app.save_coordinator.mark_dirty([("day_logs", today_str)])
 
             self.current_sound.bind(on_stop=on_complete)
 
@@ -2043,6 +4382,7 @@ class AudioManagerScreen(Screen):
     def __init__(self, app, **kwargs):
         super().__init__(**kwargs)
         self.app = app
+        self.audio_builder = None
         Clock.schedule_once(self.build_ui, 0)
 
     def build_ui(self, dt=None):
@@ -2080,8 +4420,8 @@ class AudioManagerScreen(Screen):
 
         # Audio files management
         audio_box = BoxLayout(orientation='vertical', size_hint_y=0.5, spacing=5)
-        audio_title = Label(text='Audio Files', font_size=20, size_hint_y=0.1, color=(1, 1, 1, 1))
-        audio_box.add_widget(audio_title)
+        self.audio_title = Label(text='Audio Files', font_size=20, size_hint_y=0.1, color=(1, 1, 1, 1))
+        audio_box.add_widget(self.audio_title)
 
         # Audio file list
         scroll_audio = ScrollView(size_hint_y=0.9)
@@ -2127,8 +4467,25 @@ class AudioManagerScreen(Screen):
 
             self.category_list.add_widget(row)
 
+    def on_pre_enter(self):
+        # A listing cut short by leaving the screen is started over
+        if self.audio_builder is not None and not self.audio_builder.finished:
+            self.update_audio_list()
+
+    def on_leave(self):
+        if self.audio_builder is not None and self.audio_builder.running:
+            self.audio_builder.cancel()
+
     def update_audio_list(self):
+        if self.audio_builder is not None:
+            self.audio_builder.cancel()
         self.audio_list.clear_widgets()
+        self.audio_builder = ChunkedBuilder(
+            self.audio_row_builders(),
+            on_progress=lambda done: setattr(self.audio_title, 'text', f'Audio Files (loading, {done} so far)'),
+            on_done=lambda: setattr(self.audio_title, 'text', 'Audio Files'))
+
+    def audio_row_builders(self):
         audio_dir = os.path.join(os.path.dirname(FILE), 'motivation_audio')
 
         for category in self.app.data["audio_playback"]["categories"]:
@@ -2138,29 +4495,32 @@ class AudioManagerScreen(Screen):
 
             for file in os.listdir(cat_dir):
                 if file.lower().endswith(('.mp3', '.wav', '.ogg')):
-                    row = BoxLayout(size_hint_y=None, height=50)
+                    yield lambda c=category, f=file: self.add_audio_row(c, f)
 
-                    # File name
-                    file_label = Button(
-                        text=f"{category}/{file}",
-                        color=(1, 1, 1, 1),
-                        background_color=(0.3, 0.3, 0.3, 1),
-                        size_hint_x=0.7
-                    )
-                    file_label.bind(on_press=lambda x, f=file, c=category: self.rename_audio(c, f))
-                    row.add_widget(file_label)
+    def add_audio_row(self, category, file):
+        row = BoxLayout(size_hint_y=None, height=50)
 
-                    # Delete button
-                    del_btn = Button(
-                        text='Delete',
-                        color=(1, 1, 1, 1),
-                        background_color=(0.8, 0, 0, 1),
-                        size_hint_x=0.3
-                    )
-                    del_btn.bind(on_press=lambda x, f=file, c=category: self.confirm_delete_audio(c, f))
-                    row.add_widget(del_btn)
+        # File name
+        file_label = Button(
+            text=f"{category}/{file}",
+            color=(1, 1, 1, 1),
+            background_color=(0.3, 0.3, 0.3, 1),
+            size_hint_x=0.7
+        )
+        file_label.bind(on_press=lambda x: self.rename_audio(category, file))
+        row.add_widget(file_label)
+
+        # Delete button
+        del_btn = Button(
+            text='Delete',
+            color=(1, 1, 1, 1),
+            background_color=(0.8, 0, 0, 1),
+            size_hint_x=0.3
+        )
+        del_btn.bind(on_press=lambda x: self.confirm_delete_audio(category, file))
+        row.add_widget(del_btn)
 
-                    self.audio_list.add_widget(row)
+        self.audio_list.add_widget(row)
 
     def add_category(self, instance):
         new_cat = self.new_cat_input.text.strip()
@@ -2174,7 +4534,7 @@ class AudioManagerScreen(Screen):
 
                 # Update data
                 self.app.data["audio_playback"]["categories"].append(new_cat)
-                save_data(self.app.data)
+                self.app.save_coordinator.mark_dirty([("audio_playback", "categories")])
 
                 # Update UI
                 self.update_category_list()
@@ -2184,27 +4544,11 @@ class AudioManagerScreen(Screen):
             self.app.show_popup("Please enter a category name!")
 
     def rename_category(self, old_name):
-        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        content.add_widget(Label(text=f'Rename "{old_name}" to:', color=(1, 1, 1, 1)))
-
-        new_name_input = TextInput(text=old_name, multiline=False,
-                                   foreground_color=(1, 1, 1, 1), background_color=(0.15, 0.15, 0.15, 1))
-        content.add_widget(new_name_input)
-
-        btn_layout = BoxLayout(size_hint_y=0.3, spacing=10)
-        save_btn = Button(text='Save', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        cancel_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        btn_layout.add_widget(save_btn)
-        btn_layout.add_widget(cancel_btn)
-        content.add_widget(btn_layout)
-
-        popup = Popup(title='Rename Category', content=content, size_hint=(0.8, 0.4))
-
-        def save_changes(instance):
-            new_name = new_name_input.text.strip()
+        def save_changes(new_name):
             if new_name and new_name != old_name:
                 if new_name in self.app.data["audio_playback"]["categories"]:
                     self.app.show_popup("Category name already exists!")
+                    return False
                 else:
                     # Update directory name
                     audio_dir = os.path.join(os.path.dirname(FILE), 'motivation_audio')
@@ -2216,34 +4560,20 @@ class AudioManagerScreen(Screen):
                     # Update data
                     index = self.app.data["audio_playback"]["categories"].index(old_name)
                     self.app.data["audio_playback"]["categories"][index] = new_name
-                    save_data(self.app.data)
+                    self.app.save_coordinator.mark_dirty([("audio_playback", "categories")])
 
                     # Update UI
                     self.update_category_list()
                     self.update_audio_list()
-                    popup.dismiss()
                     self.app.show_popup(f"Category renamed to '{new_name}'!")
             else:
                 self.app.show_popup("Please enter a valid new name!")
+                return False
 
-        save_btn.bind(on_press=save_changes)
-        cancel_btn.bind(on_press=popup.dismiss)
-        popup.open()
+        self.app.dialogs.prompt('Rename Category', f'Rename "{old_name}" to:', old_name, save_changes)
 
     def confirm_delete_category(self, category):
-        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        content.add_widget(Label(text=f'Delete "{category}" and all its contents?', color=(1, 1, 1, 1)))
-
-        btn_layout = BoxLayout(size_hint_y=0.3, spacing=10)
-        yes_btn = Button(text='Delete', color=(1, 1, 1, 1), background_color=(0.8, 0, 0, 1))
-        no_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        btn_layout.add_widget(yes_btn)
-        btn_layout.add_widget(no_btn)
-        content.add_widget(btn_layout)
-
-        popup = Popup(title='Confirm Delete', content=content, size_hint=(0.8, 0.4))
-
-        def delete_category(instance):
+        def delete_category():
             # Delete directory and contents
             audio_dir = os.path.join(os.path.dirname(FILE), 'motivation_audio')
             cat_dir = os.path.join(audio_dir, category)
@@ -2254,37 +4584,18 @@ class AudioManagerScreen(Screen):
 
             # Update data
             self.app.data["audio_playback"]["categories"].remove(category)
-            save_data(self.app.data)
+            self.app.save_coordinator.mark_dirty([("audio_playback", "categories")])
 
             # Update UI
             self.update_category_list()
             self.update_audio_list()
-            popup.dismiss()
             self.app.show_popup(f"Category '{category}' deleted!")
 
-        yes_btn.bind(on_press=delete_category)
-        no_btn.bind(on_press=popup.dismiss)
-        popup.open()
+        self.app.dialogs.confirm('Confirm Delete', f'Delete "{category}" and all its contents?', delete_category,
+                                 confirm_text='Delete', cancel_text='Cancel', confirm_color=(0.8, 0, 0, 1))
 
     def rename_audio(self, category, filename):
-        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        content.add_widget(Label(text=f'Rename "{filename}" to:', color=(1, 1, 1, 1)))
-
-        new_name_input = TextInput(text=os.path.splitext(filename)[0], multiline=False,
-                                   foreground_color=(1, 1, 1, 1), background_color=(0.15, 0.15, 0.15, 1))
-        content.add_widget(new_name_input)
-
-        btn_layout = BoxLayout(size_hint_y=0.3, spacing=10)
-        save_btn = Button(text='Save', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        cancel_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        btn_layout.add_widget(save_btn)
-        btn_layout.add_widget(cancel_btn)
-        content.add_widget(btn_layout)
-
-        popup = Popup(title='Rename Audio', content=content, size_hint=(0.8, 0.4))
-
-        def save_changes(instance):
-            new_name = new_name_input.text.strip()
+        def save_changes(new_name):
             if new_name:
                 audio_dir = os.path.join(os.path.dirname(FILE), 'motivation_audio')
                 old_path = os.path.join(audio_dir, category, filename)
@@ -2294,48 +4605,70 @@ class AudioManagerScreen(Screen):
                 try:
                     os.rename(old_path, new_path)
                     self.update_audio_list()
-                    popup.dismiss()
                     self.app.show_popup("Audio file renamed!")
                 except Exception as e:
                     self.app.show_popup(f"Error: {str(e)}")
+                    return False
             else:
                 self.app.show_popup("Please enter a valid name!")
+                return False
 
-        save_btn.bind(on_press=save_changes)
-        cancel_btn.bind(on_press=popup.dismiss)
-        popup.open()
+        self.app.dialogs.prompt('Rename Audio', f'Rename "{filename}" to:', os.path.splitext(filename)[0],
+                                save_changes)
 
     def confirm_delete_audio(self, category, filename):
-        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        content.add_widget(Label(text=f'Delete "{filename}"?', color=(1, 1, 1, 1)))
-
-        btn_layout = BoxLayout(size_hint_y=0.3, spacing=10)
-        yes_btn = Button(text='Delete', color=(1, 1, 1, 1), background_color=(0.8, 0, 0, 1))
-        no_btn = Button(text='Cancel', color=(1, 1, 1, 1), background_color=(0.3, 0.3, 0.3, 1))
-        btn_layout.add_widget(yes_btn)
-        btn_layout.add_widget(no_btn)
-        content.add_widget(btn_layout)
-
-        popup = Popup(title='Confirm Delete', content=content, size_hint=(0.8, 0.4))
-
-        def delete_audio(instance):
+        def delete_audio():
             audio_dir = os.path.join(os.path.dirname(FILE), 'motivation_audio')
             file_path = os.path.join(audio_dir, category, filename)
 
             if os.path.exists(file_path):
                 os.remove(file_path)
                 self.update_audio_list()
-                popup.dismiss()
                 self.app.show_popup("Audio file deleted!")
             else:
                 self.app.show_popup("File not found!")
+                return False
 
-        yes_btn.bind(on_press=delete_audio)
-        no_btn.bind(on_press=popup.dismiss)
-        popup.open()
+        self.app.dialogs.confirm('Confirm Delete', f'Delete "{filename}"?', delete_audio,
+                                 confirm_text='Delete', cancel_text='Cancel', confirm_color=(0.8, 0, 0, 1))
+
+
+class LazyScreenManager(ScreenManager):
+    """ScreenManager whose registered screens are only constructed when first needed.
+
+    has_screen() stays true only for screens that have been constructed."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, factory):
+        """factory(name) returns the screen; it is called on first get_screen(name)"""
+        self.factories[name] = factory
+
+    def get_screen(self, name):
+        factory = self.factories.pop(name, None)
+        if factory is not None:
+            screen = factory(name)
+            # Entered right away, so build now rather than on the next frame
+            Clock.unschedule(screen.build_ui)
+            screen.build_ui()
+            self.add_widget(screen)
+            return screen
+        return super().get_screen(name)
+
+    def prewarm(self, dt=None):
+        """Build the remaining screens, one per frame, while the app is idle"""
+        if self.factories:
+            self.get_screen(next(iter(self.factories)))
+            Clock.schedule_once(self.prewarm, 0)
 
 
 class HabitBuilderApp(App):
+    # on_day_log_changed(date) fires for every day log mutation that is saved;
+    # on_history_invalidated when anything that shapes every entry changes
+    __events__ = ('on_day_log_changed', 'on_history_invalidated')
+
     def build(self):
         Window.clearcolor = (0.2, 0.2, 0.2, 1)
         if platform == 'android':
@@ -2347,25 +4680,24 @@ class HabitBuilderApp(App):
                 print(f"Permission error: {e}")
 
         self.title = "Habit Builder"
-        self.data = load_data()
+        # Only the header is parsed before the first frame, day_logs follows in the background
+        self.history_ready = Future()
+        self.data = load_data(self.history_ready)
+        self.questions_version = 0
+        self.dialogs = DialogPool()
+        self.save_coordinator = SaveCoordinator(self)
+        self.search_index = SearchIndex()
         self.day_num = get_day_number(self.data["start_date"])
-        self.sm = ScreenManager()
-
-        # Create screens
-        self.habits_screen = HabitsScreen(self, name='habits')
-        self.journal_screen = JournalScreen(self, name='journal')
-        self.history_screen = HistoryScreen(self, name='history')
-        self.settings_screen = SettingsScreen(self, name='settings')
-        self.audio_screen = AudioPlayerScreen(self, name='audio')
-        self.audio_manager_screen = AudioManagerScreen(self, name='audio_manager')
-
-        # Add screens to manager
-        self.sm.add_widget(self.habits_screen)
-        self.sm.add_widget(self.journal_screen)
-        self.sm.add_widget(self.history_screen)
-        self.sm.add_widget(self.settings_screen)
-        self.sm.add_widget(self.audio_screen)
-        self.sm.add_widget(self.audio_manager_screen)
+        self.sm = LazyScreenManager()
+
+        # Only the habits screen is built at startup, the others on first visit
+        self.sm.add_widget(HabitsScreen(self, name='habits'))
+        self.sm.register('journal', lambda name: JournalScreen(self, name=name))
+        self.sm.register('history', lambda name: HistoryScreen(self, name=name))
+        self.sm.register('settings', lambda name: SettingsScreen(self, name=name))
+        self.sm.register('audio', lambda name: AudioPlayerScreen(self, name=name))
+        self.sm.register('audio_manager', lambda name: AudioManagerScreen(self, name=name))
+        self.sm.register('journal_questions', lambda name: JournalQuestionManager(self, name=name))
 
         # Navigation bar
         nav_layout = BoxLayout(size_hint_y=0.12, padding=2, spacing=2)
@@ -2395,14 +4727,63 @@ class HabitBuilderApp(App):
         main_layout.add_widget(self.sm)
         main_layout.add_widget(nav_layout)
 
-        # Initialize this after loading data
-        self.journal_questions_screen = JournalQuestionManager(self, name='journal_questions')
-        self.sm.add_widget(self.journal_questions_screen)
-
         # Schedule reminders on app start
         Clock.schedule_once(lambda dt: self.schedule_daily_reminder(), 1)
+        Clock.schedule_once(self.sm.prewarm, SCREEN_PREWARM_DELAY)
         return main_layout
 
+    @property
+    def habits_screen(self):
+        return self.sm.get_screen('habits')
+
+    @property
+    def journal_screen(self):
+        return self.sm.get_screen('journal')
+
+    @property
+    def history_screen(self):
+        return self.sm.get_screen('history')
+
+    @property
+    def settings_screen(self):
+        return self.sm.get_screen('settings')
+
+    @property
+    def audio_screen(self):
+        return self.sm.get_screen('audio')
+
+    @property
+    def audio_manager_screen(self):
+        return self.sm.get_screen('audio_manager')
+
+    @property
+    def journal_questions_screen(self):
+        return self.sm.get_screen('journal_questions')
+
+    def on_day_log_changed(self, date_str):
+        pass
+
+    def on_history_invalidated(self):
+        pass
+
+    def when_history_loaded(self, callback):
+        """Run callback() now if day_logs is loaded, otherwise on the Clock once it is"""
+        if self.history_ready.done():
+            callback()
+        else:
+            self.history_ready.add_done_callback(lambda future: Clock.schedule_once(lambda dt: callback(), 0))
+
+    def on_pause(self):
+        self.save_coordinator.flush()
+        self.search_index.flush()
+        return True
+
+    def on_stop(self):
+        self.save_coordinator.flush()
+        self.search_index.flush()
+        persistence_worker.wait()
+        index_worker.wait()
+
     def schedule_daily_reminder(self):
         # Cancel any existing scheduled reminders
         if hasattr(self, 'reminder_event'):
@@ -2442,6 +4823,11 @@ class HabitBuilderApp(App):
             self.schedule_daily_reminder()
             return
 
+        if not self.history_ready.done():
+            # Whether today is logged is only known once the history is in
+            self.when_history_loaded(self.show_reminder)
+            return
+
         # Skip if already logged today
         today_str = datetime.today().strftime("%Y-%m-%d")
         if today_str in self.data.get("day_logs", {}):
@@ -2456,15 +4842,15 @@ class HabitBuilderApp(App):
         if streak == 0 and last_streak > 0:
             message = "Your streak was broken! Start a new one today!"
         elif streak == 0 and self.data.get("last_log_date", ""):
-            last_log = datetime.strptime(self.data["last_log_date"], "%Y-%m-%d")
-            days_missed = (datetime.today() - last_log).days
+            days_missed = today_ordinal() - date_ordinal(self.data["last_log_date"])
             if days_missed > 1:
                 message = f"You've missed {days_missed} days. It's never too late to restart!"
 
         # Update streak tracking
         self.data["reminder_settings"]["last_streak"] = streak
         self.data["reminder_settings"]["last_reminder"] = time.time()
-        save_data(self.data)
+        self.save_coordinator.mark_dirty([("reminder_settings", "last_streak"),
+                                          ("reminder_settings", "last_reminder")])
 
         # Show reminder popup
         self.show_reminder_popup(message)
@@ -2507,10 +4893,10 @@ class HabitBuilderApp(App):
                 "type": ntype,
                 "message": message
             })
-            save_data(self.data)
+            self.save_coordinator.mark_dirty([("notification_history",)])
 
-            # Refresh history display if we're on settings screen
-            if hasattr(self.settings_screen, 'update_notification_history'):
+            # Refresh history display if the settings screen has been built
+            if self.sm.has_screen('settings'):
                 self.settings_screen.update_notification_history()
 
         def show_reminder_popup(self, message):
@@ -2528,7 +4914,7 @@ class HabitBuilderApp(App):
 
         def snooze(instance):
             self.data["reminder_settings"]["snooze_until"] = time.time() + 3600  # 1 hour
-            save_data(self.data)
+            self.save_coordinator.mark_dirty([("reminder_settings", "snooze_until")])
             popup.dismiss()
             self.schedule_daily_reminder()
 
@@ -2580,6 +4966,10 @@ class HabitBuilderApp(App):
         popup.open()
 
     def submit_log(self, log):
+        if not self.history_ready.done():
+            # Submitted as soon as the history is in, so today's entry cannot be missed
+            self.when_history_loaded(lambda: self.submit_log(log))
+            return
         today_str = datetime.today().strftime("%Y-%m-%d")
         if today_str in self.data.get("day_logs", {}):
             self.show_popup("You've already logged today!")
@@ -2592,9 +4982,7 @@ class HabitBuilderApp(App):
         self.data["total_points"] = self.data.get("total_points", 0) + total
         update_levels_and_milestones(self.data, self)
 
-        if "day_logs" not in self.data:
-            self.data["day_logs"] = {}
-
+        compact_day_logs(self.data)
         self.data["day_logs"][today_str] = {
             "DayNumber": self.day_num,
             "Completion": log.get("Completion", "100"),
@@ -2605,7 +4993,9 @@ class HabitBuilderApp(App):
             "StreakBonus": streak_bonus
         }
 
-        save_data(self.data)
+        self.search_index.update_day(self.data, today_str)
+        self.save_coordinator.mark_dirty([("day_logs", today_str), ("total_points",), ("current_level",),
+                                          ("milestones",), ("streak",), ("last_log_date",)])
         self.day_num = get_day_number(self.data["start_date"])
         message = random.choice(MOTIVATIONAL_MESSAGES)
         self.show_popup(message)
@@ -2671,9 +5061,7 @@ class HabitBuilderApp(App):
         self.audio_screen.play_audio(full_path)
 
     def show_popup(self, message):
-        content = Label(text=message, color=(1, 1, 1, 1))
-        popup = Popup(title='Notification', content=content, size_hint=(0.8, 0.4), auto_dismiss=True)
-        popup.open()
+        self.dialogs.notify(message)
 
     def play_random_audio(self):
         today = datetime.today().strftime("%Y-%m-%d")
@@ -2718,7 +5106,7 @@ class HabitBuilderApp(App):
 
         # Save to history
         self.data["day_logs"][today]["AudioPlayed"] = f"{category}/{audio_file}"
-        save_data(self.data)
+        self.save_coordinator.mark_dirty([("day_logs", today), ("audio_playback",)])
 
         # Play the audio
         full_path = os.path.join(category, audio_file)
@@ -2727,7 +5115,7 @@ class HabitBuilderApp(App):
 
     def on_audio_completed(self, instance):
         today = datetime.today().strftime("%Y-%m-%d")
-        save_data(self.data)
+        self.save_coordinator.mark_dirty([("day_logs", today)])
 
 if __name__ == '__main__':
     HabitBuilderApp().run()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# main derives FILE and the other data paths from the working directory when
+# it is imported, so every test runs in one scratch directory
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def _clear_data_dir():
+    main.persistence_worker.wait()
+    main.index_worker.wait()
+    for name in os.listdir("."):
+        if os.path.isdir(name):
+            shutil.rmtree(name)
+        else:
+            os.remove(name)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    """An empty data directory in the default "wal" mode; returns a function
+    that waits for the writer thread, so files on disk can be checked"""
+    _clear_data_dir()
+    monkeypatch.setattr(main, "STORAGE_MODE", "wal")
+    monkeypatch.setattr(main, "_wal_generation", 0)
+    monkeypatch.setattr(main, "_snapshot_needed", True)
+    yield main.persistence_worker.wait
+    _clear_data_dir()
+
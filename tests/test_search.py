@@ -0,0 +1,192 @@
+import operator
+import os
+from datetime import date
+
+import main
+
+
+JOURNALS = {
+    "2026-02-01": "learned to juggle",
+    "2026-02-02": "long walk by the river",
+    "2026-02-03": "worked on the garden",
+    "2026-02-04": "read a word a day",
+}
+
+
+def journal_data(journals=JOURNALS):
+    """Default data with one day per journal entry, Exercise done on even days"""
+    data = main.get_default_data()
+    for day_number, (date_str, text) in enumerate(sorted(journals.items()), 1):
+        data["day_logs"][date_str] = {
+            "DayNumber": day_number,
+            "Completion": "50",
+            "Energy": str(day_number + 4),
+            "Habits": {habit["name"]: habit["name"] == "Exercise (20–30 min)" and day_number % 2 == 0
+                       for habit in data["habits"]},
+            "Points": 5,
+            "StreakBonus": 0,
+            "Journal": {"free_text": text, "answers": []},
+        }
+    main.compact_day_logs(data)
+    return data
+
+
+def postings(index):
+    return {key: list(ordinals) for key, ordinals in index.postings.items()}
+
+
+def dates(ordinals):
+    return sorted(main.ordinal_date(ordinal) for ordinal in ordinals)
+
+
+def test_synced_index_is_written_and_loaded_back(storage):
+    data = journal_data()
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    main.index_worker.wait()
+    assert os.path.exists("index.json")
+
+    loaded = main.SearchIndex("index.json")
+    loaded.load()
+    assert postings(loaded) == postings(index)
+    assert dates(loaded.candidates("juggle")) == ["2026-02-01"]
+
+    # Nothing is missing, so a sync rewrites nothing
+    mtime = os.path.getmtime("index.json")
+    loaded.sync(data)
+    main.index_worker.wait()
+    assert os.path.getmtime("index.json") == mtime
+
+
+def test_day_updates_are_logged_and_replayed(storage):
+    data = journal_data()
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    data["day_logs"]["2026-02-02"]["Journal"] = {"free_text": "swam in the lake", "answers": []}
+    index.update_day(data, "2026-02-02")
+    del data["day_logs"]["2026-02-03"]
+    index.update_day(data, "2026-02-03")
+    main.index_worker.wait()
+    assert os.path.exists(index.log_path)
+
+    loaded = main.SearchIndex("index.json")
+    loaded.load()
+    assert postings(loaded) == postings(index)
+    assert dates(loaded.candidates("lake")) == ["2026-02-02"]
+    assert not loaded.candidates("river")
+    assert not loaded.candidates("garden")
+
+    index.flush()
+    main.index_worker.wait()
+    assert not os.path.exists(index.log_path)
+
+
+def test_torn_log_tail_is_ignored(storage):
+    data = journal_data()
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    data["day_logs"]["2026-02-01"]["Journal"] = {"free_text": "painted a fence", "answers": []}
+    index.update_day(data, "2026-02-01")
+    main.index_worker.wait()
+    with open(index.log_path, "a") as f:
+        f.write('{"gen": %d, "day": 7' % index.generation)
+
+    loaded = main.SearchIndex("index.json")
+    loaded.load()
+    assert postings(loaded) == postings(index)
+    assert dates(loaded.candidates("fence")) == ["2026-02-01"]
+
+
+def test_changed_questions_rebuild_the_index(storage):
+    data = journal_data()
+    data["day_logs"]["2026-02-01"]["Journal"]["answers"] = [{"question_idx": 0, "text": "fine"}]
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    assert dates(index.candidates("how was your day")) == ["2026-02-01"]
+
+    data["reminder_settings"]["journal_questions"][0]["text"] = "Anything to note?"
+    index.sync(data)
+    main.index_worker.wait()
+    assert not index.candidates("how was your day")
+    assert dates(index.candidates("anything to note")) == ["2026-02-01"]
+
+    loaded = main.SearchIndex("index.json")
+    loaded.load()
+    assert loaded.fingerprint == index.fingerprint
+    assert postings(loaded) == postings(index)
+
+
+def test_habit_rename_reindexes_days_with_the_habit(storage):
+    data = journal_data()
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    assert len(index.candidates("exercise")) == len(JOURNALS)
+
+    habit = next(habit for habit in data["habits"] if habit["name"] == "Exercise (20–30 min)")
+    main.rename_habit(data, habit, "Workout")
+    index.sync(data)
+    main.index_worker.wait()
+    assert not index.candidates("exercise")
+    assert len(index.candidates("workout")) == len(JOURNALS)
+
+
+def test_parse_query_fields():
+    query = main.parse_query('habit:Exercise done:no energy>=7 points<10 date:2026-05..2026-07 "long walk" river')
+    assert query.habits == ["exercise"]
+    assert query.done is False
+    assert query.comparisons == [("Energy", operator.ge, 7), ("Points", operator.lt, 10)]
+    assert (query.first, query.last) == (date(2026, 5, 1).toordinal(), date(2026, 7, 31).toordinal())
+    assert query.texts == ["long walk", "river"]
+
+    query = main.parse_query("date:2026..")
+    assert (query.first, query.last) == (date(2026, 1, 1).toordinal(), None)
+    # Filters that do not parse are searched for as text
+    assert main.parse_query("mood:great energy>high").texts == ["mood:great", "energy>high"]
+
+
+def search_both_ways(data, text):
+    """query_history's result, checked to be the same with and without an index"""
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    result = main.query_history(data, text, index)
+    assert main.query_history(data, text) == result
+    return result
+
+
+def test_query_history_matches_with_and_without_an_index(storage):
+    data = journal_data()
+    assert search_both_ways(data, "") == sorted(JOURNALS, reverse=True)
+    assert search_both_ways(data, "walk") == ["2026-02-02"]
+    assert search_both_ways(data, '"a word"') == ["2026-02-04"]
+    assert search_both_ways(data, "habit:exercise done:yes") == ["2026-02-04", "2026-02-02"]
+    assert search_both_ways(data, "habit:exercise done:no energy>5") == ["2026-02-03"]
+    assert search_both_ways(data, "date:2026-02-02..2026-02-03") == ["2026-02-03", "2026-02-02"]
+    assert search_both_ways(data, "habit:swimming") == []
+    assert search_both_ways(data, "day:1 juggle") == ["2026-02-01"]
+    assert search_both_ways(data, "garden river") == []
+
+
+def test_fuzzy_distance_grows_with_word_length():
+    assert [main.fuzzy_distance(word) for word in ("work", "lerned", "journals", "2026-02")] == [0, 1, 2, 0]
+    assert main.edit_distance("lerned", "learned") == 1
+    assert main.edit_distance("kitten", "sitting") == 3
+
+
+def test_fuzzy_words_match_near_misses_only(storage):
+    data = journal_data()
+    assert search_both_ways(data, "lerned") == ["2026-02-01"]
+    assert search_both_ways(data, "gardn") == ["2026-02-03"]
+    # Too short for a typo: "word" does not find "worked", nor "work" find "word"
+    assert search_both_ways(data, "word") == ["2026-02-04"]
+    assert not main.day_fuzzy_matches(dict(data["day_logs"]["2026-02-04"]), [], "work")
+    assert search_both_ways(data, "lernd") == []
+
+
+def test_fuzzy_search_without_a_usable_tree_verifies_every_day(storage):
+    data = journal_data()
+    index = main.SearchIndex("index.json")
+    index.sync(data)
+    index.fuzzy = main.BKTree(limit=1)
+    index.fuzzy.add("juggle")
+    assert index.fuzzy_days("lerned") is None
+    assert main.query_history(data, "lerned", index) == ["2026-02-01"]
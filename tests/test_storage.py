@@ -0,0 +1,262 @@
+import json
+import os
+
+import pytest
+
+import main
+
+
+HABITS = ["Wake up early", "Exercise (20–30 min)", "Meditation (10–15 min)"]
+
+
+def day_log(day_number, done=(), energy="5", text=""):
+    """A day log shaped like the ones submit_log and save_journal write"""
+    return {
+        "DayNumber": day_number,
+        "Completion": str(round(len(done) / len(HABITS) * 100)),
+        "Energy": energy,
+        "Habits": {name: name in done for name in HABITS},
+        "Points": 5 * len(done),
+        "StreakBonus": 0,
+        "Journal": {"free_text": text, "answers": []},
+    }
+
+
+def plain_logs(day_logs):
+    return {date_str: dict(day_logs[date_str]) for date_str in day_logs}
+
+
+def test_wal_records_replay_over_the_snapshot(storage):
+    data = main.load_data()
+    main.save_data(data)
+    storage()
+    snapshot = open(main.FILE).read()
+
+    data["day_logs"]["2026-03-01"] = day_log(1, ["Wake up early"], text="first day")
+    data["reminder_settings"]["time"] = "07:30"
+    main.save_data(data, [("day_logs", "2026-03-01"), ("reminder_settings", "time")])
+    storage()
+
+    assert open(main.FILE).read() == snapshot
+    assert os.path.exists(main.WAL_FILE)
+    loaded = main.load_data()
+    assert loaded["reminder_settings"]["time"] == "07:30"
+    assert plain_logs(loaded["day_logs"]) == {"2026-03-01": day_log(1, ["Wake up early"], text="first day")}
+
+
+def test_wal_replays_deletes(storage):
+    data = main.load_data()
+    data["day_logs"]["2026-03-01"] = day_log(1)
+    data["day_logs"]["2026-03-02"] = day_log(2)
+    main.save_data(data)
+    storage()
+
+    del data["day_logs"]["2026-03-01"]
+    main.save_data(data, [("day_logs", "2026-03-01")])
+    storage()
+
+    assert list(main.load_data()["day_logs"]) == ["2026-03-02"]
+
+
+def test_torn_wal_tail_and_old_generations_are_skipped(storage):
+    data = main.load_data()
+    main.save_data(data)
+    storage()
+    data["reminder_settings"]["time"] = "06:00"
+    main.save_data(data, [("reminder_settings", "time")])
+    storage()
+    generation = main._wal_generation
+    with open(main.WAL_FILE, "a") as f:
+        # Folded into the snapshot already by an older generation
+        f.write(json.dumps({"gen": generation - 1, "path": ["streak"], "value": 99}) + "\n")
+        # A write cut short by a crash
+        f.write('{"gen": %d, "path": ["total_poi' % generation)
+
+    loaded = main.load_data()
+    assert loaded["reminder_settings"]["time"] == "06:00"
+    assert loaded["streak"] == 0
+
+
+def test_compaction_folds_the_log_into_the_snapshot(storage, monkeypatch):
+    monkeypatch.setattr(main, "WAL_COMPACT_BYTES", 512)
+    data = main.load_data()
+    main.save_data(data)
+    storage()
+
+    expected = {}
+    for day in range(1, 21):
+        date_str = f"2026-04-{day:02d}"
+        data["day_logs"][date_str] = expected[date_str] = day_log(day, ["Wake up early"], text="x" * 50)
+        main.save_data(data, [("day_logs", date_str)])
+    storage()
+
+    # Compaction ran at least once along the way, and left a short log behind
+    assert not os.path.exists(main.WAL_FILE) or os.path.getsize(main.WAL_FILE) <= 512
+    main.compact_wal()
+    assert not os.path.exists(main.WAL_FILE)
+    assert plain_logs(main.load_data()["day_logs"]) == expected
+
+
+def test_backup_is_used_when_the_snapshot_is_torn(storage):
+    data = main.load_data()
+    data["day_logs"]["2026-03-01"] = day_log(1)
+    main.save_data(data)
+    storage()
+    main._snapshot_needed = True
+    main.save_data(data)
+    storage()
+
+    with open(main.FILE, "w") as f:
+        f.write('{"schema_version": ')
+    assert list(main.load_data()["day_logs"]) == ["2026-03-01"]
+
+
+def test_sqlite_migrates_and_round_trips_day_logs(storage, monkeypatch):
+    data = main.load_data()
+    expected = {f"2026-05-{day:02d}": day_log(day, HABITS[:day % 3], energy=str(day % 10 + 1), text=f"day {day}")
+                for day in range(1, 11)}
+    expected["2026-05-03"]["Journal"]["answers"] = [{"question_idx": 0, "text": "fine"},
+                                                    {"question_idx": 1, "selected": 2}]
+    for date_str, log in expected.items():
+        data["day_logs"][date_str] = log
+    main.save_data(data)
+    storage()
+
+    monkeypatch.setattr(main, "STORAGE_MODE", "sqlite")
+    migrated = main.load_data()
+    storage()
+    assert os.path.exists(main.DB_FILE)
+    assert plain_logs(migrated["day_logs"]) == expected
+
+    migrated["day_logs"]["2026-05-11"] = expected["2026-05-11"] = day_log(11, HABITS)
+    del migrated["day_logs"]["2026-05-02"]
+    del expected["2026-05-02"]
+    main.save_data(migrated, [("day_logs", "2026-05-11"), ("day_logs", "2026-05-02")])
+    storage()
+
+    assert plain_logs(main.load_data()["day_logs"]) == expected
+
+
+def sharded_data(storage, monkeypatch, months):
+    """Data saved in sharded mode with one day in each of months, loaded back"""
+    data = main.load_data()
+    for month in months:
+        data["day_logs"][f"{month}-01"] = day_log(1, text=month)
+    main.save_data(data)
+    storage()
+    monkeypatch.setattr(main, "STORAGE_MODE", "sharded")
+    main.load_data()
+    storage()
+    return main.load_data()
+
+
+def test_sharded_round_trip_rewrites_only_touched_months(storage, monkeypatch):
+    data = sharded_data(storage, monkeypatch, ["2025-01", "2025-02", "2025-03"])
+    assert isinstance(data["day_logs"], main.ShardedDayLogs)
+    assert sorted(os.listdir(main.LOGS_DIR)) == ["2025-01.json", "2025-02.json", "2025-03.json"]
+    untouched = os.path.getmtime(os.path.join(main.LOGS_DIR, "2025-01.json"))
+
+    data["day_logs"]["2025-02-14"] = day_log(2, HABITS)
+    del data["day_logs"]["2025-03-01"]
+    main.save_data(data, [("day_logs", "2025-02-14"), ("day_logs", "2025-03-01")])
+    storage()
+
+    assert os.path.getmtime(os.path.join(main.LOGS_DIR, "2025-01.json")) == untouched
+    loaded = main.load_data()
+    assert list(loaded["day_logs"]) == ["2025-01-01", "2025-02-01", "2025-02-14"]
+    assert dict(loaded["day_logs"]["2025-02-14"]) == day_log(2, HABITS)
+    assert loaded["day_logs"]["2025-01-01"]["Journal"]["free_text"] == "2025-01"
+
+
+def test_sharded_months_with_unsaved_edits_are_not_evicted(storage, monkeypatch):
+    months = [f"2024-{month:02d}" for month in range(1, 13)]
+    data = sharded_data(storage, monkeypatch, months)
+    day_logs = data["day_logs"]
+
+    day_logs["2024-01-01"] = day_log(1, HABITS, text="edited")
+    for month in months[1:]:
+        assert day_logs[f"{month}-01"]["DayNumber"] == 1
+    assert "2024-01" in day_logs.resident
+    assert len(day_logs.resident) <= main.SHARD_CACHE_MONTHS + 2
+
+    # Saved along with an unrelated change, and evictable after that
+    main.save_data(data, [("streak",)])
+    storage()
+    assert not day_logs.unsaved_months()
+    for month in months[1:]:
+        day_logs[f"{month}-01"]
+    assert "2024-01" not in day_logs.resident
+    assert main.load_data()["day_logs"]["2024-01-01"]["Journal"]["free_text"] == "edited"
+
+
+def test_migrations_are_ordered_and_end_at_the_schema_version():
+    versions = [version for version, migration in main.MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[-1] == main.SCHEMA_VERSION
+
+
+def legacy_data():
+    """Data as the first releases wrote it: string habits and no schema_version"""
+    return {
+        "start_date": "2023-01-01",
+        "total_points": 5,
+        "habits": ["Read", "Run"],
+        "day_logs": {"2023-01-01": {"DayNumber": 1, "Completion": "50", "Energy": "5",
+                                    "Habits": {"Read": True, "Swim": False}, "Points": 5,
+                                    "StreakBonus": 0, "Journal": {"free_text": "", "answers": []}}},
+        "reminder_settings": {"enabled": True, "time": "21:00",
+                              "habits_enabled": {"Run": True, "Gone": False}},
+    }
+
+
+def test_legacy_data_is_migrated_to_habit_ids():
+    data = legacy_data()
+    assert main.migrate_data(data)
+    assert not main.migrate_data(data)
+
+    assert data["schema_version"] == main.SCHEMA_VERSION
+    assert data["habit_names"] == ["Read", "Run", "Swim"]
+    assert data["habits"] == [{"name": "Read", "points": 5, "id": 0}, {"name": "Run", "points": 5, "id": 1}]
+    assert data["reminder_settings"]["habits_enabled"] == {main.habit_key(data["habits"][1]): True}
+    assert data["reminder_settings"]["journal_questions"]
+    assert data["audio_playback"]["file_history"] == {}
+    assert data["total_points"] == 5
+
+
+def test_load_data_persists_the_migration(storage):
+    with open(main.FILE, "w") as f:
+        json.dump(legacy_data(), f)
+
+    data = main.load_data()
+    storage()
+    assert data["schema_version"] == main.SCHEMA_VERSION
+    assert dict(data["day_logs"]["2023-01-01"])["Habits"] == {"Read": True, "Swim": False}
+
+    with open(main.FILE) as f:
+        assert json.loads(f.readline())["schema_version"] == main.SCHEMA_VERSION
+    reloaded = main.load_data()
+    assert [habit["id"] for habit in reloaded["habits"]] == [0, 1]
+    assert plain_logs(reloaded["day_logs"]) == plain_logs(data["day_logs"])
+
+
+@pytest.mark.parametrize("mode", ["wal", "sqlite", "sharded"])
+def test_habit_renames_survive_a_reload(storage, monkeypatch, mode):
+    data = main.load_data()
+    data["day_logs"]["2025-06-01"] = day_log(1, ["Exercise (20–30 min)"])
+    data["day_logs"]["2026-01-01"] = day_log(2, HABITS)
+    main.save_data(data)
+    storage()
+    monkeypatch.setattr(main, "STORAGE_MODE", mode)
+    data = main.load_data()
+    storage()
+
+    habit = next(habit for habit in data["habits"] if habit["name"] == "Exercise (20–30 min)")
+    main.rename_habit(data, habit, "Workout")
+    main.save_data(data, [("habits",), ("habit_names",)])
+    storage()
+
+    loaded = main.load_data()
+    assert [habit["name"] for habit in loaded["habits"]][1] == "Workout"
+    assert loaded["day_logs"]["2025-06-01"]["Habits"] == {"Wake up early": False, "Workout": True,
+                                                         "Meditation (10–15 min)": False}
+    assert loaded["day_logs"]["2026-01-01"]["Habits"]["Workout"] is True